@@ -1,23 +1,279 @@
 import os
-from transformers import pipeline, Pipeline
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Optional
+from .batching import MicroBatcher
+
+if TYPE_CHECKING:
+    # transformers (and torch) are imported on first model load, never at import time
+    from transformers import Pipeline
 
 MODEL_NAME = os.getenv("MODEL_NAME", "distilbert-base-uncased-distilled-squad")
+AI_BACKEND = os.getenv("AI_BACKEND", "torch").strip().lower()   # torch | int8 (dynamic-quantized torch) | onnx
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "onnx", MODEL_NAME.replace("/", "__"))
+BACKENDS = ("torch", "int8", "onnx")
+FAQ_ONLY = os.getenv("FAQ_ONLY", "0") == "1"   # never load the model; medium matches become tickets
+AI_BATCH_MAX_SIZE    = int(os.getenv("AI_BATCH_MAX_SIZE", "8"))         # 1 → no batching, infer inline
+AI_BATCH_MAX_WAIT_MS = float(os.getenv("AI_BATCH_MAX_WAIT_MS", "5"))    # how long a batch waits to fill
+AI_INFERENCE_WORKERS = int(os.getenv("AI_INFERENCE_WORKERS", str(os.cpu_count() or 1)))  # unbatched executor size
+AI_QUEUE_MAX         = int(os.getenv("AI_QUEUE_MAX", "64"))             # pending async requests before 503
+AI_SHED_MAX_INFLIGHT = int(os.getenv("AI_SHED_MAX_INFLIGHT", "16"))     # in-flight AI requests before medium matches skip the model (0 = off)
+AI_SHED_LATENCY_MS   = float(os.getenv("AI_SHED_LATENCY_MS", "2000"))   # recent AI latency (EWMA) before the same (0 = off)
+AI_LATENCY_EWMA_ALPHA = float(os.getenv("AI_LATENCY_EWMA_ALPHA", "0.2"))
+AI_MAX_SEQ_LEN       = int(os.getenv("AI_MAX_SEQ_LEN", "384"))          # question + context tokens per window
+AI_MAX_QUESTION_LEN  = int(os.getenv("AI_MAX_QUESTION_LEN", "64"))
+AI_DOC_STRIDE        = int(os.getenv("AI_DOC_STRIDE", "128"))
+AI_MAX_ANSWER_LEN    = int(os.getenv("AI_MAX_ANSWER_LEN", "15"))         # pipeline default; longer spans shift scores
+
+# Passed on every pipeline call so windowing never depends on pipeline defaults
+QA_KWARGS = dict(max_seq_len=AI_MAX_SEQ_LEN, max_question_len=AI_MAX_QUESTION_LEN,
+                 doc_stride=AI_DOC_STRIDE, max_answer_len=AI_MAX_ANSWER_LEN)
+
+class InferenceOverloaded(Exception):
+    """Raised when too many AI requests are already waiting for the model."""
+
+def build_pipeline(backend: str = AI_BACKEND, onnx_dir: str = ONNX_MODEL_DIR) -> "Pipeline":
+    """Question-answering pipeline for MODEL_NAME on the given CPU backend."""
+    from transformers import pipeline
+
+    if backend == "torch":
+        return pipeline("question-answering", model=MODEL_NAME)
+    if backend == "int8":
+        import torch
+        from transformers import AutoModelForQuestionAnswering, AutoTokenizer
+        model = AutoModelForQuestionAnswering.from_pretrained(MODEL_NAME)
+        # Linear layers → int8 weights, activations quantized on the fly
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("question-answering", model=model, tokenizer=AutoTokenizer.from_pretrained(MODEL_NAME))
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForQuestionAnswering
+        except ImportError as e:
+            raise RuntimeError("AI_BACKEND=onnx needs optimum[onnxruntime] installed") from e
+        from transformers import AutoTokenizer
+        if not os.path.isdir(onnx_dir):
+            raise RuntimeError(f"No ONNX export at {onnx_dir}; run `python -m app.export_model` first")
+        model = ORTModelForQuestionAnswering.from_pretrained(onnx_dir)
+        return pipeline("question-answering", model=model, tokenizer=AutoTokenizer.from_pretrained(onnx_dir))
+    raise ValueError(f"Unknown AI_BACKEND {backend!r}; expected one of {BACKENDS}")
 
 @lru_cache(maxsize=1)
-def get_qa_model() -> Pipeline:
+def get_qa_model() -> "Pipeline":
     # Lazy load + cache
-    return pipeline("question-answering", model=MODEL_NAME)
+    if FAQ_ONLY:
+        raise RuntimeError("AI is disabled (FAQ_ONLY=1)")
+    return build_pipeline(AI_BACKEND)
+
+_warm = threading.Event()
+
+def warm_up() -> None:
+    """Load the pipeline and run one throwaway inference so the first real request is fast."""
+    nlp = get_qa_model()
+    nlp(question="When is support available?", context="Our support hours are 9am to 5pm, Monday to Friday.", **QA_KWARGS)
+    _warm.set()
+
+def model_ready() -> bool:
+    return _warm.is_set()
+
+def _faq_block(faq) -> str:
+    return f"Q: {faq.question}\nA: {faq.answer}"
+
+@lru_cache(maxsize=8192)
+def _token_ends(text: str) -> tuple[int, ...]:
+    # Char offset where each model token of `text` ends; computed once per FAQ block.
+    # FAQ blocks only: one-off questions would evict them.
+    enc = get_qa_model().tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    return tuple(end for _, end in enc["offset_mapping"])
+
+def pack_context(question: str, scored_faqs, max_chars: int = 1800) -> str:
+    """Join the best FAQs into one context that fits a single model window.
+
+    Blocks are taken in score order until the token budget (AI_MAX_SEQ_LEN minus
+    question and special tokens) runs out; the last one is cut on a token
+    boundary. Until the model is loaded this falls back to a character cap so
+    callers never block on loading the tokenizer.
+    """
+    blocks = [_faq_block(faq) for faq, _ in scored_faqs]
+    if get_qa_model.cache_info().currsize == 0:
+        return "\n\n".join(blocks)[:max_chars]
+    try:
+        return _pack_tokens(question, blocks)
+    except Exception:
+        return "\n\n".join(blocks)[:max_chars]
+
+def _pack_tokens(question: str, blocks: list[str]) -> str:
+    tokenizer = get_qa_model().tokenizer
+    # Full length: the fast-tokenizer QA path truncates only the context, not the question
+    q_tokens = len(tokenizer(question, add_special_tokens=False)["input_ids"])
+    budget = AI_MAX_SEQ_LEN - q_tokens - tokenizer.num_special_tokens_to_add(pair=True)
+    sep_tokens = len(_token_ends("\n\n"))
+    parts: list[str] = []
+    for block in blocks:
+        if parts:
+            budget -= sep_tokens
+        ends = _token_ends(block)
+        if len(ends) <= budget:
+            parts.append(block)
+            budget -= len(ends)
+            continue
+        if budget > 0:
+            parts.append(block[:ends[budget - 1]])
+        break
+    return "\n\n".join(parts)
+
+class InferenceBatcher(MicroBatcher):
+    """Runs concurrent (question, context) pairs through the pipeline as one batch."""
+    name = "qa-batcher"
+
+    def _process(self, items: list) -> list:
+        nlp = get_qa_model()
+        results = nlp(question=[q for q, _ in items], context=[c for _, c in items],
+                      batch_size=len(items), **QA_KWARGS)
+        # the pipeline unwraps single-item lists
+        return [results] if isinstance(results, dict) else results
+
+batcher = InferenceBatcher(AI_BATCH_MAX_SIZE, AI_BATCH_MAX_WAIT_MS)
+
+_executor: ThreadPoolExecutor | None = None
+_replay: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+def _inference_executor() -> ThreadPoolExecutor:
+    # Dedicated to forward passes, so they never occupy FastAPI's I/O threadpool
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, AI_INFERENCE_WORKERS), thread_name_prefix="qa-infer")
+    return _executor
+
+def _replay_executor() -> ThreadPoolExecutor:
+    # One thread: concurrent /ask/batch replays take turns instead of stacking up on the CPU
+    global _replay
+    if _replay is None:
+        with _executor_lock:
+            if _replay is None:
+                _replay = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-replay")
+    return _replay
+
+def pending_inferences() -> int:
+    return _pending
+
+def _add_pending(n: int) -> None:
+    global _pending
+    with _pending_lock:
+        _pending += n
+
+class AdmissionController:
+    """Decides whether a new request may wait on the model, from in-flight count and recent latency.
+
+    Over the latency budget a request is still let through when nothing is in flight,
+    so the average keeps tracking the model once load drops.
+    """
+
+    def __init__(self, inflight: Callable[[], int], max_inflight: int, latency_budget_s: float, alpha: float):
+        self.inflight = inflight
+        self.max_inflight = max_inflight
+        self.latency_budget_s = latency_budget_s
+        self.alpha = alpha
+        self.latency_ewma = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            if self.latency_ewma:
+                self.latency_ewma += self.alpha * (seconds - self.latency_ewma)
+            else:
+                self.latency_ewma = seconds
+
+    def shed_reason(self) -> Optional[str]:
+        """None to admit, else why the model should be skipped ("inflight" or "latency")."""
+        inflight = self.inflight()
+        if self.max_inflight > 0 and inflight >= self.max_inflight:
+            return "inflight"
+        if self.latency_budget_s > 0 and inflight and self.latency_ewma > self.latency_budget_s:
+            return "latency"
+        return None
+
+admission = AdmissionController(pending_inferences, AI_SHED_MAX_INFLIGHT, AI_SHED_LATENCY_MS / 1000.0,
+                                AI_LATENCY_EWMA_ALPHA)
+
+def _parse(result: dict) -> tuple[str, float]:
+    answer = (result.get("answer") or "").strip()
+    score = float(result.get("score") or 0.0)
+    return answer, score
 
 def answer_with_ai(question: str, context: str) -> tuple[str, float]:
     if not context.strip():
         return "", 0.0
     try:
-        nlp = get_qa_model()
-        result = nlp(question=question, context=context)
-        answer = (result.get("answer") or "").strip()
-        score = float(result.get("score") or 0.0)
-        return answer, score
+        if batcher.max_batch > 1:
+            result = batcher.submit((question, context)).result()
+        else:
+            result = get_qa_model()(question=question, context=context, **QA_KWARGS)
+        return _parse(result)
     except Exception:
         # Fail closed → let caller fall back to ticket
         return "", 0.0
+
+async def answer_with_ai_async(question: str, context: str) -> tuple[str, float]:
+    """Non-blocking answer_with_ai; raises InferenceOverloaded once AI_QUEUE_MAX requests are pending."""
+    global _pending
+    if not context.strip():
+        return "", 0.0
+    with _pending_lock:
+        if _pending >= AI_QUEUE_MAX:
+            raise InferenceOverloaded()
+        _pending += 1
+    t0 = time.perf_counter()
+    try:
+        if batcher.max_batch > 1:
+            result = await asyncio.wrap_future(batcher.submit((question, context)))
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                _inference_executor(), lambda: get_qa_model()(question=question, context=context, **QA_KWARGS))
+        return _parse(result)
+    except Exception:
+        # Fail closed → let caller fall back to ticket
+        return "", 0.0
+    finally:
+        # Queueing included: that is what a new request would wait for
+        admission.observe(time.perf_counter() - t0)
+        with _pending_lock:
+            _pending -= 1
+
+def answer_many_with_ai(pairs: list[tuple[str, str]], batch_size: int = AI_BATCH_MAX_SIZE) -> list[tuple[str, float]]:
+    """Offline batch path: run (question, context) pairs through the model `batch_size` at a time.
+
+    Bypasses the shared batcher so a large replay never queues ahead of live /ask
+    traffic. The chunk on the model counts in pending_inferences(), so AI_QUEUE_MAX
+    and admission see the CPU it takes.
+    """
+    out: list[tuple[str, float]] = [("", 0.0)] * len(pairs)
+    todo = [i for i, (_, c) in enumerate(pairs) if c.strip()]
+    size = max(1, batch_size)
+    for start in range(0, len(todo), size):
+        idx = todo[start:start + size]
+        _add_pending(len(idx))
+        try:
+            results = get_qa_model()(question=[pairs[i][0] for i in idx], context=[pairs[i][1] for i in idx],
+                                     batch_size=len(idx), **QA_KWARGS)
+        except Exception:
+            # Fail closed for this chunk → those questions fall back to tickets
+            continue
+        finally:
+            _add_pending(-len(idx))
+        for i, result in zip(idx, [results] if isinstance(results, dict) else results):
+            out[i] = _parse(result)
+    return out
+
+async def answer_many_with_ai_async(pairs: list[tuple[str, str]]) -> list[tuple[str, float]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_replay_executor(), answer_many_with_ai, pairs)
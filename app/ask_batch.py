@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+
+from .main import iter_batch_answers
+from .schemas import AskBatchRequest
+from .ticket_writer import ticket_writer
+
+def read_questions(path: str):
+    """One question per line; .jsonl files (e.g. chat logs) use each record's "question" field."""
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as fh:
+        for line in fh:
+            if path.endswith(".jsonl"):
+                if line.strip():
+                    yield str(json.loads(line).get("question") or "")
+            elif line.strip():
+                yield line.rstrip("\n")
+
+async def run(args) -> Counter:
+    opts = AskBatchRequest(questions=[], create_tickets=args.create_tickets, faq_threshold=args.faq_threshold,
+                           ai_min_threshold=args.ai_min_threshold, ai_conf_threshold=args.ai_conf_threshold)
+    counts: Counter = Counter()
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        async for line in iter_batch_answers(read_questions(args.path), opts):
+            counts[line.get("source", "error")] += 1
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return counts
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay questions through FAQ → AI → ticket routing, NDJSON out.")
+    parser.add_argument("path", help="questions file: plain text (one per line) or .jsonl; - for stdin")
+    parser.add_argument("--out", help="write NDJSON results here instead of stdout")
+    parser.add_argument("--create-tickets", action="store_true", help="actually create tickets (default: dry run)")
+    parser.add_argument("--faq-threshold", type=float, help="override FAQ_STRICT_THRESHOLD")
+    parser.add_argument("--ai-min-threshold", type=float, help="override AI_TRY_MIN_THRESHOLD")
+    parser.add_argument("--ai-conf-threshold", type=float, help="override AI_CONFIDENCE_THRESHOLD")
+    args = parser.parse_args()
+
+    counts = asyncio.run(run(args))
+    ticket_writer.close()
+    print("✅ " + ", ".join(f"{src}: {n}" for src, n in sorted(counts.items())), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
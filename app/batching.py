@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+_STOP = object()
+
+class MicroBatcher:
+    """Background worker that groups concurrent submissions into batches.
+
+    The first queued item opens a batch; it is processed once `max_batch` items
+    have joined or `max_wait_ms` has passed, whichever comes first. Subclasses
+    implement `_process(items) -> results` (one result per item); each
+    submission gets a Future resolved with its result, or with the exception
+    the batch raised.
+    """
+    name = "micro-batcher"
+
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, item: Any) -> Future:
+        fut: Future = Future()
+        self._ensure_started()
+        self._queue.put((item, fut))
+        return fut
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Process everything already queued, then stop the worker."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _process(self, items: list) -> list:
+        raise NotImplementedError
+
+    def _ensure_started(self) -> None:
+        # Started on first use so a forking server never inherits a dead worker thread
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = [first], False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._handle(batch)
+            if stop:
+                return
+
+    def _handle(self, batch: list) -> None:
+        live = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            results = self._process([item for item, _ in live])
+            for (_, fut), result in zip(live, results):
+                fut.set_result(result)
+        except Exception as e:
+            for _, fut in live:
+                fut.set_exception(e)
@@ -0,0 +1,26 @@
+import argparse
+import os
+
+from .db import Base, engine, SessionLocal, DB_PATH
+from .faq_matcher import build_snapshot
+from .index_store import db_stamp, save
+
+DEFAULT_PATH = os.getenv("FAQ_INDEX_PATH") or os.path.join(os.path.dirname(DB_PATH), "faq_index.bin")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the memory-mappable FAQ index artifact.")
+    parser.add_argument("--path", default=DEFAULT_PATH, help=f"output file (default: {DEFAULT_PATH})")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        stamp = db_stamp(db)
+        snap = build_snapshot(db)
+    finally:
+        db.close()
+    save(snap, stamp, args.path)
+    print(f"✅ Built FAQ index ({len(snap.entries)} FAQs) → {args.path}")
+
+if __name__ == "__main__":
+    main()
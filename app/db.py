@@ -1,15 +1,55 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 import os
 
 # Database path
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "support.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+# DATABASE_URL (e.g. postgresql+psycopg://…) overrides the local SQLite file
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{DB_PATH}"
+if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):   # Heroku/Railway style URLs
+    SQLALCHEMY_DATABASE_URL = "postgresql://" + SQLALCHEMY_DATABASE_URL[len("postgres://"):]
+
+# ---------- Storage profile (override via .env) ----------
+DB_POOL_SIZE           = int(os.getenv("DB_POOL_SIZE", "40"))          # ≈ FastAPI/AnyIO threadpool size
+DB_MAX_OVERFLOW        = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_S      = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+SQLITE_PROFILE         = os.getenv("SQLITE_PROFILE", "tuned")          # tuned | default (stock pragmas)
+SQLITE_JOURNAL_MODE    = os.getenv("SQLITE_JOURNAL_MODE", "WAL")       # readers no longer block on writers
+SQLITE_SYNCHRONOUS     = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")     # safe with WAL, far fewer fsyncs
+SQLITE_MMAP_SIZE       = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB   = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+# ---------------------------------------------------------
+
+pool_args = dict(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT_S)
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        **pool_args,
+    )
+
+    if SQLITE_PROFILE == "tuned":
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            cur.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE:d}")
+            cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS:d}")
+            cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB:d}")   # negative → KiB
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.close()
+else:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, pool_recycle=1800, **pool_args)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -20,3 +60,27 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async access for async endpoints: sessions run on a small dedicated executor,
+# so SQLite commits never block the event loop or FastAPI's request threadpool.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+_db_executor: ThreadPoolExecutor | None = None
+_db_executor_lock = threading.Lock()
+
+def _executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(max_workers=max(1, DB_EXECUTOR_WORKERS), thread_name_prefix="db")
+    return _db_executor
+
+async def run_db(fn, *args):
+    """Await fn(session, *args) on the DB executor with a session of its own."""
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+    return await asyncio.get_running_loop().run_in_executor(_executor(), call)
@@ -0,0 +1,66 @@
+import argparse
+
+from .ai import MODEL_NAME, ONNX_MODEL_DIR, BACKENDS, build_pipeline, pack_context, QA_KWARGS
+from .db import SessionLocal
+from .faq_matcher import rank_faqs, faq_index
+from .main import TOPK_FOR_AI
+
+def export_onnx(out_dir: str, quantize: bool) -> None:
+    """Export MODEL_NAME to ONNX (optionally dynamic-int8 quantized) for AI_BACKEND=onnx."""
+    from optimum.onnxruntime import ORTModelForQuestionAnswering, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForQuestionAnswering.from_pretrained(MODEL_NAME, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    if not quantize:
+        model.save_pretrained(out_dir)
+        tokenizer.save_pretrained(out_dir)
+        return
+    tmp_dir = out_dir + ".fp32"
+    model.save_pretrained(tmp_dir)
+    quantizer = ORTQuantizer.from_pretrained(tmp_dir)
+    quantizer.quantize(save_dir=out_dir, quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False))
+    tokenizer.save_pretrained(out_dir)
+
+def sample_pairs(limit: int) -> list[tuple[str, str]]:
+    # Each FAQ question against the context /ask would build for it
+    db = SessionLocal()
+    try:
+        questions = [e.question for e in faq_index.entries(db)[:limit]]
+        return [(q, pack_context(q, rank_faqs(q, db, k=TOPK_FOR_AI).top)) for q in questions]
+    finally:
+        db.close()
+
+def parity_check(backend: str, pairs: list[tuple[str, str]], tol: float, onnx_dir: str = ONNX_MODEL_DIR) -> int:
+    """Compare `backend` against the reference torch pipeline; returns the number of mismatches."""
+    ref, cand = build_pipeline("torch"), build_pipeline(backend, onnx_dir)
+    bad = 0
+    for q, ctx in pairs:
+        r, c = ref(question=q, context=ctx, **QA_KWARGS), cand(question=q, context=ctx, **QA_KWARGS)
+        ok = r["answer"].strip() == c["answer"].strip() and abs(r["score"] - c["score"]) <= tol
+        bad += not ok
+        print(f"{'✅' if ok else '❌'} {q[:50]!r}: ref={r['answer']!r} ({r['score']:.3f})  {backend}={c['answer']!r} ({c['score']:.3f})")
+    return bad
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the QA model for faster CPU backends and check parity.")
+    parser.add_argument("--out", default=ONNX_MODEL_DIR, help=f"ONNX export directory (default: {ONNX_MODEL_DIR})")
+    parser.add_argument("--quantize", action="store_true", help="dynamic-int8 quantize the ONNX graph")
+    parser.add_argument("--skip-export", action="store_true", help="only run the parity check")
+    parser.add_argument("--check", choices=[b for b in BACKENDS if b != "torch"], help="backend to compare against torch")
+    parser.add_argument("--samples", type=int, default=20, help="FAQ questions used for the parity check")
+    parser.add_argument("--tol", type=float, default=0.05, help="max allowed |score difference|")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_onnx(args.out, args.quantize)
+        print(f"✅ Exported {MODEL_NAME} → {args.out}")
+    if args.check:
+        bad = parity_check(args.check, sample_pairs(args.samples), args.tol, args.out)
+        if bad:
+            raise SystemExit(f"{bad} parity mismatch(es) beyond tolerance {args.tol}")
+        print("✅ Parity check passed")
+
+if __name__ == "__main__":
+    main()
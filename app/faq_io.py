@@ -0,0 +1,218 @@
+"""Streaming FAQ import/export shared by POST /faqs/bulk, GET /faqs/export and app/import_faqs.py.
+
+Records are JSON objects (one per line) or CSV rows with a header, carrying
+`question`, `answer` and optionally `keywords` and `id`. Upserts match on `id`
+when given, otherwise on the exact question text.
+"""
+import csv
+import io
+import json
+import os
+from typing import Iterable, Iterator, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .models import FAQ
+
+FAQ_IMPORT_CHUNK_SIZE = int(os.getenv("FAQ_IMPORT_CHUNK_SIZE", "1000"))   # rows per transaction
+FORMATS = ("jsonl", "csv")
+FIELDS = ("id", "question", "answer", "keywords")
+_MAX_ERRORS = 50   # error messages kept in the result; all failures are still counted
+
+class ImportStats:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: list[str] = []
+
+    def fail(self, line: int, msg: str) -> None:
+        self.failed += 1
+        if len(self.errors) < _MAX_ERRORS:
+            self.errors.append(f"record at line {line}: {msg}")
+
+    def as_dict(self) -> dict:
+        return {"inserted": self.inserted, "updated": self.updated, "failed": self.failed, "errors": self.errors}
+
+class RecordParser:
+    """Incremental JSONL/CSV parser: feed() text as it arrives, get back complete records.
+
+    Yields (line_no, dict) for every record; malformed ones are recorded on `stats`.
+    """
+
+    def __init__(self, fmt: str, stats: ImportStats):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+        self.fmt, self.stats = fmt, stats
+        self._tail = ""          # incomplete trailing line
+        self._pending = ""       # CSV record spanning lines (open quote)
+        self._pending_start = 0
+        self._line = 0
+        self._header: Optional[list[str]] = None
+
+    def feed(self, text: str) -> list[tuple[int, dict]]:
+        lines = (self._tail + text).split("\n")
+        self._tail = lines.pop()
+        return [rec for line in lines for rec in self._line_records(line + "\n")]
+
+    def close(self) -> list[tuple[int, dict]]:
+        out = list(self._line_records(self._tail)) if self._tail else []
+        self._tail = ""
+        if self._pending:
+            self.stats.fail(self._pending_start, "unterminated quoted CSV field")
+            self._pending = ""
+        return out
+
+    def _line_records(self, line: str) -> Iterator[tuple[int, dict]]:
+        self._line += 1
+        if self.fmt == "jsonl":
+            if not line.strip():
+                return
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                self.stats.fail(self._line, f"invalid JSON ({e})")
+                return
+            if not isinstance(rec, dict):
+                self.stats.fail(self._line, "expected a JSON object")
+                return
+            yield self._line, rec
+            return
+
+        # CSV: a record ends once its double quotes are balanced
+        if not self._pending:
+            self._pending_start = self._line
+        self._pending += line
+        if self._pending.count('"') % 2:
+            return
+        text, self._pending = self._pending, ""
+        if not text.strip():
+            return
+        row = next(csv.reader([text]))
+        if self._header is None:
+            self._header = [h.strip().lower() for h in row]
+            return
+        yield self._pending_start, dict(zip(self._header, row))
+
+_MAX_ID = 2**63 - 1   # BIGINT / SQLite INTEGER range
+
+def _clean(rec: dict) -> dict:
+    question = str(rec.get("question") or "").strip()
+    answer = str(rec.get("answer") or "").strip()
+    if not question or not answer:
+        raise ValueError("question and answer are required")
+    raw_id = rec.get("id")
+    if raw_id in (None, ""):
+        faq_id = None
+    else:
+        if isinstance(raw_id, float) and not raw_id.is_integer():
+            raise ValueError(f"id must be an integer, got {raw_id!r}")
+        faq_id = int(raw_id)
+        if not 1 <= faq_id <= _MAX_ID:
+            raise ValueError(f"id out of range: {raw_id!r}")
+    out = {"id": faq_id, "question": question, "answer": answer}
+    # Absent keywords leave an existing row's keywords alone; present (even empty) overwrites them
+    if "keywords" in rec:
+        keywords = rec["keywords"]
+        if isinstance(keywords, list):
+            keywords = ",".join(str(k) for k in keywords)
+        out["keywords"] = str(keywords or "").strip()
+    return out
+
+def _apply(db: Session, rows: list[dict]) -> tuple[int, int]:
+    """Stage inserts/updates for cleaned rows (no commit); returns (inserted, updated)."""
+    ids = {r["id"] for r in rows if r["id"] is not None}
+    questions = {r["question"] for r in rows if r["id"] is None}
+    by_id = {f.id: f for f in db.query(FAQ).filter(FAQ.id.in_(ids))} if ids else {}
+    by_question = {f.question: f for f in db.query(FAQ).filter(FAQ.question.in_(questions))} if questions else {}
+
+    inserted = updated = 0
+    for r in rows:
+        existing = by_id.get(r["id"]) if r["id"] is not None else by_question.get(r["question"])
+        if existing is not None:
+            existing.question, existing.answer = r["question"], r["answer"]
+            if "keywords" in r:
+                existing.keywords = r["keywords"]
+            updated += 1
+            continue
+        f = FAQ(id=r["id"], question=r["question"], answer=r["answer"], keywords=r.get("keywords", ""))
+        db.add(f)
+        # later duplicates in the same chunk update this row instead of inserting again
+        if r["id"] is not None:
+            by_id[r["id"]] = f
+        else:
+            by_question[r["question"]] = f
+        inserted += 1
+    db.flush()
+    return inserted, updated
+
+def upsert_chunk(db: Session, records: list[tuple[int, dict]], stats: ImportStats) -> None:
+    """Insert or update one chunk of records in a single transaction.
+
+    If the database rejects the chunk, it is retried one row per transaction
+    so only the offending rows are counted as failed.
+    """
+    rows = []
+    for line, rec in records:
+        try:
+            rows.append((line, _clean(rec)))
+        except (ValueError, TypeError, OverflowError) as e:
+            stats.fail(line, str(e))
+    if not rows:
+        return
+
+    try:
+        inserted, updated = _apply(db, [r for _, r in rows])
+        db.commit()
+    except (SQLAlchemyError, OverflowError):
+        db.rollback()
+    else:
+        stats.inserted += inserted
+        stats.updated += updated
+        return
+
+    for line, r in rows:
+        try:
+            inserted, updated = _apply(db, [r])
+            db.commit()
+        except (SQLAlchemyError, OverflowError) as e:
+            db.rollback()
+            stats.fail(line, f"rejected by the database ({type(e).__name__})")
+            continue
+        stats.inserted += inserted
+        stats.updated += updated
+
+def import_lines(db: Session, lines: Iterable[str], fmt: str, chunk_size: int = FAQ_IMPORT_CHUNK_SIZE) -> ImportStats:
+    """Stream text (e.g. an open file) through the parser, upserting `chunk_size` records per transaction."""
+    stats = ImportStats()
+    parser = RecordParser(fmt, stats)
+    chunk: list[tuple[int, dict]] = []
+    for text in lines:
+        chunk += parser.feed(text)
+        while len(chunk) >= chunk_size:
+            upsert_chunk(db, chunk[:chunk_size], stats)
+            chunk = chunk[chunk_size:]
+    chunk += parser.close()
+    if chunk:
+        upsert_chunk(db, chunk, stats)
+    return stats
+
+def export_lines(db: Session, fmt: str, batch_size: int = 1000) -> Iterator[str]:
+    """Yield the FAQ table as JSONL or CSV text, one chunk per `batch_size` rows."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if fmt == "csv":
+        writer.writerow(FIELDS)
+    rows = db.query(FAQ.id, FAQ.question, FAQ.answer, FAQ.keywords).order_by(FAQ.id).yield_per(batch_size)
+    for n, row in enumerate(rows, 1):
+        if fmt == "jsonl":
+            buf.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n")
+        else:
+            writer.writerow(row)
+        if n % batch_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.getvalue():
+        yield buf.getvalue()
@@ -1,8 +1,35 @@
+import os
 import re
-from typing import Optional, Tuple, List
+import logging
+import threading
+from collections import defaultdict
+from typing import NamedTuple, Optional, Tuple, List
+import numpy as np
 from sqlalchemy.orm import Session
-from rapidfuzz import fuzz
-from .models import FAQ
+from rapidfuzz import fuzz, process
+from .db import SessionLocal
+from .models import FAQ, FAQRevision
+
+# Ranking backend: "fuzzy" (rapidfuzz + keyword overlap) or "tfidf" (scikit-learn cosine)
+RETRIEVER = os.getenv("FAQ_RETRIEVER", "fuzzy").strip().lower()
+TFIDF_REFIT_RATIO = float(os.getenv("FAQ_TFIDF_REFIT_RATIO", "0.1"))   # appended share that forces a refit
+# Optional on-disk index artifact shared by workers (empty → build from the DB in each process)
+INDEX_PATH = os.getenv("FAQ_INDEX_PATH", "")
+# rapidfuzz worker threads for scoring calls (-1 → all cores; app.serve sets its per-worker share)
+MATCH_WORKERS = int(os.getenv("FAQ_MATCH_WORKERS", "-1"))
+# Calls comparing fewer question x choice pairs run on one thread: starting the pool costs more
+MATCH_PARALLEL_MIN_CELLS = int(os.getenv("FAQ_MATCH_PARALLEL_MIN_CELLS", "1000"))
+# Inverted-index pruning: only fuzzy-score FAQs sharing a token with the question
+PRUNE_MIN_CORPUS     = int(os.getenv("FAQ_PRUNE_MIN_CORPUS", "5000"))      # smaller corpora → full scan
+PRUNE_MIN_CANDIDATES = int(os.getenv("FAQ_PRUNE_MIN_CANDIDATES", "3"))     # shortlist smaller → full scan
+PRUNE_MAX_DF         = float(os.getenv("FAQ_PRUNE_MAX_DF", "0.02"))         # tokens in more of the FAQs don't widen the shortlist
+PRUNE_VERIFY         = os.getenv("FAQ_PRUNE_VERIFY", "0") == "1"           # also rank exhaustively and log diffs
+# Index loads re-read when faqs changed mid-read, before settling for a stale revision
+LOAD_RETRIES = 3
+# Multi-question ranking: question x FAQ scores held in memory at once
+BATCH_SCORE_CELLS = int(os.getenv("FAQ_BATCH_SCORE_CELLS", "2000000"))
+
+log = logging.getLogger(__name__)
 
 _word_re = re.compile(r"\b\w+\b", re.UNICODE)
 _STOP = {"the","a","an","is","are","do","does","you","your","yours","to","for","and","or","of","at","in","on","by","with"}
@@ -24,39 +51,430 @@ def _keyword_set(keywords: str | None) -> set[str]:
         out |= _token_set(p)
     return out
 
-def _score_pair(q: str, faq: FAQ) -> float:
-    """Blended score in [0,1]: 65% fuzzy, 35% token overlap (keywords > question)."""
-    q = (q or "").strip().lower()
-    q_tokens = _token_set(q)
-    key_set = _token_set(str(faq.keywords or "")) or _token_set(str(faq.question))
+class FAQEntry:
+    """Detached FAQ row with everything the scorer needs precomputed."""
+    __slots__ = ("id", "question", "answer", "keywords", "qa_text", "_key_set", "_tokens")
+
+    def __init__(self, id: int, question: str, answer: str, keywords: str | None):
+        self.id = id
+        self.question = question
+        self.answer = answer
+        self.keywords = keywords
+        self.qa_text = f"{question} {answer}"
+        self._key_set: Optional[frozenset] = None
+        self._tokens: Optional[frozenset] = None
+
+    @classmethod
+    def from_row(cls, faq: FAQ) -> "FAQEntry":
+        return cls(faq.id, str(faq.question), str(faq.answer), faq.keywords)
+
+    @property
+    def key_set(self) -> frozenset:
+        if self._key_set is None:
+            self._key_set = frozenset(_token_set(str(self.keywords or "")) or _token_set(self.question))
+        return self._key_set
+
+    @property
+    def tokens(self) -> frozenset:
+        # Everything a question can share with this FAQ, for the inverted index
+        if self._tokens is None:
+            self._tokens = frozenset(_token_set(self.qa_text) | _keyword_set(self.keywords))
+        return self._tokens
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+def _postings(entries: List[FAQEntry], attr: str) -> dict[str, np.ndarray]:
+    rows_by_token: dict[str, list[int]] = defaultdict(list)
+    for row, e in enumerate(entries):
+        for t in getattr(e, attr):
+            rows_by_token[t].append(row)
+    return {t: np.asarray(rows, dtype=np.int64) for t, rows in rows_by_token.items()}
+
+def _appended_postings(postings: dict[str, np.ndarray], tokens, row: int) -> dict[str, np.ndarray]:
+    out = dict(postings)
+    for t in tokens:
+        out[t] = np.append(postings.get(t, _EMPTY_ROWS), row)
+    return out
+
+class _Snapshot:
+    """Immutable scoring view over a list of entries.
+
+    `choices` is questions followed by question+answer texts, so one cdist call
+    covers both fuzzy terms. The keyword token matrix is stored column-wise:
+    `key_postings[token]` holds the rows whose key set contains the token.
+    `postings` is the inverted index over all question/answer/keyword tokens.
+    `fitted` holds retriever state derived from this snapshot (see Retriever.prepare).
+    """
+    __slots__ = ("entries", "choices", "key_postings", "key_len", "postings", "fitted")
+
+    def __init__(self, entries: List[FAQEntry]):
+        self.entries = entries
+        self.choices = [e.question for e in entries] + [e.qa_text for e in entries]
+        self.key_postings = _postings(entries, "key_set")
+        self.postings = _postings(entries, "tokens")
+        self.key_len = np.fromiter((len(e.key_set) for e in entries), dtype=np.int64, count=len(entries))
+        self.fitted = {}
+
+    @classmethod
+    def from_parts(cls, entries: List[FAQEntry], key_postings: dict[str, np.ndarray],
+                   postings: dict[str, np.ndarray], key_len: np.ndarray) -> "_Snapshot":
+        snap = cls.__new__(cls)
+        snap.entries = entries
+        snap.choices = [e.question for e in entries] + [e.qa_text for e in entries]
+        snap.key_postings, snap.postings, snap.key_len = key_postings, postings, key_len
+        snap.fitted = {}
+        return snap
+
+    def appended(self, entry: FAQEntry) -> "_Snapshot":
+        n = len(self.entries)
+        return _Snapshot.from_parts(
+            self.entries + [entry],
+            _appended_postings(self.key_postings, entry.key_set, n),
+            _appended_postings(self.postings, entry.tokens, n),
+            np.append(self.key_len, len(entry.key_set)),
+        )
+
+    def candidates(self, q_tokens: set[str], max_rows: int) -> np.ndarray:
+        """Sorted rows sharing a selective token with the question.
+
+        Tokens found in more than `max_rows` FAQs are skipped, unless the
+        question has nothing rarer; then only its rarest token is used.
+        """
+        hits = sorted((self.postings[t] for t in q_tokens if t in self.postings), key=len)
+        hits = [p for p in hits if len(p) <= max_rows] or hits[:1]
+        return np.unique(np.concatenate(hits)) if hits else _EMPTY_ROWS
+
+def faq_revision(db: Session) -> int:
+    """Write counter of the faqs table, kept by DB triggers (see models.FAQRevision)."""
+    return db.query(FAQRevision.revision).filter(FAQRevision.id == 1).scalar() or 0
 
-    # Jaccard overlap
-    denom = len(q_tokens | key_set)
-    jacc  = (len(q_tokens & key_set) / denom) if denom else 0.0
+def build_snapshot(db: Session) -> _Snapshot:
+    return _Snapshot([FAQEntry.from_row(f) for f in db.query(FAQ).all()])
 
-    # Fuzzy against question and (question+answer)
-    f1 = fuzz.token_set_ratio(q, str(faq.question)) / 100.0
-    f2 = fuzz.token_set_ratio(q, f"{faq.question} {faq.answer}") / 100.0
-    fuzzy = max(f1, f2)
+class FAQIndex:
+    """Process-wide FAQ index: loaded from the DB once, then kept in sync by the write paths.
+
+    `revision` is the faqs write counter the snapshot reflects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self.revision: Optional[int] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def current(self) -> Optional[_Snapshot]:
+        """The published snapshot, without loading one (None when cold)."""
+        return self._snapshot
+
+    def snapshot(self, db: Optional[Session] = None) -> _Snapshot:
+        """Current snapshot; a cold load uses `db`, or a short-lived session of its own."""
+        snap = self._snapshot
+        if snap is None:
+            with self._lock:
+                if self._snapshot is None:
+                    if db is not None:
+                        loaded, revision = self._load(db)
+                    else:
+                        with SessionLocal() as own:
+                            loaded, revision = self._load(own)
+                    retriever.prepare(loaded)
+                    self._snapshot, self.revision = loaded, revision
+                snap = self._snapshot
+        return snap
+
+    @staticmethod
+    def _load(db: Session) -> tuple[_Snapshot, int]:
+        # The counter and the rows may be read from different DB states (pysqlite
+        # issues no BEGIN for a SELECT), so only trust a revision that held still
+        # across the read; otherwise it's a lower bound the poller catches up from
+        for _ in range(LOAD_RETRIES):
+            revision = faq_revision(db)
+            if INDEX_PATH:
+                # Shared on-disk artifact, rebuilt when stale (see app/index_store.py)
+                from .index_store import load_or_build
+                snap = load_or_build(db, INDEX_PATH, revision)
+            else:
+                snap = build_snapshot(db)
+            if faq_revision(db) == revision:
+                break
+        return snap, revision
+
+    def entries(self, db: Optional[Session] = None) -> List[FAQEntry]:
+        return self.snapshot(db).entries
+
+    def add(self, faq: FAQ, revision: int) -> None:
+        """Append a committed row; `revision` is faq_revision() read in the transaction that wrote it."""
+        with self._lock:
+            # Not loaded yet → the next load picks the row up from the DB anyway
+            if self._snapshot is None:
+                return
+            if any(e.id == faq.id for e in self._snapshot.entries):
+                # A load that raced the write already picked the row up
+                self.revision = max(self.revision or 0, revision)
+                return
+            if revision == (self.revision or 0) + 1:
+                snap = self._snapshot.appended(FAQEntry.from_row(faq))
+                retriever.prepare(snap, self._snapshot)
+                self._snapshot, self.revision = snap, revision
+                return
+        # Other writes landed since this snapshot was loaded
+        self.refresh()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def refresh(self, db: Optional[Session] = None) -> None:
+        """Load a fresh snapshot and swap it in; readers keep using the old one meanwhile."""
+        if db is not None:
+            snap, revision = self._load(db)
+        else:
+            with SessionLocal() as own:
+                snap, revision = self._load(own)
+        retriever.prepare(snap, self._snapshot)
+        with self._lock:
+            # A concurrent add() may already have moved past what was just read
+            if self._snapshot is None or revision >= (self.revision or 0):
+                self._snapshot, self.revision = snap, revision
+
+faq_index = FAQIndex()
+
+def _match_workers(cells: int) -> int:
+    return MATCH_WORKERS if cells >= MATCH_PARALLEL_MIN_CELLS else 1
+
+def _score_all(q: str, q_tokens: set[str], snap: _Snapshot, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Blended scores in [0,1]: 65% fuzzy, 35% token overlap (keywords > question).
+
+    Scores every FAQ, or only `rows` (sorted) when given, in that order.
+    """
+    if rows is None:
+        return _score_many([q], [q_tokens], snap)[0]
+    n, m = len(snap.entries), len(rows)
+    if not m:
+        return np.zeros(0)
+    choices = [snap.choices[i] for i in rows] + [snap.choices[n + i] for i in rows]
+
+    # Fuzzy against question and (question+answer), one batched call
+    raw = process.cdist([q], choices, scorer=fuzz.token_set_ratio,
+                        dtype=np.float64, workers=_match_workers(len(choices)))[0]
+    fuzzy = np.maximum(raw[:m], raw[m:]) / 100.0
+
+    # Jaccard overlap, counted only for the shortlisted rows
+    hits = [snap.key_postings[t] for t in q_tokens if t in snap.key_postings]
+    if hits:
+        hit_rows, counts = np.unique(np.concatenate(hits), return_counts=True)
+        pos = np.minimum(np.searchsorted(hit_rows, rows), len(hit_rows) - 1)
+        inter = np.where(hit_rows[pos] == rows, counts[pos], 0)
+    else:
+        inter = np.zeros(m, dtype=np.int64)
+    union = len(q_tokens) + snap.key_len[rows] - inter
+    jacc = np.divide(inter, union, out=np.zeros(m), where=union > 0)
 
     return 0.65 * fuzzy + 0.35 * jacc
 
-def best_faq(question: str, db: Session) -> Optional[Tuple[FAQ, float]]:
-    q = (question or "").strip().lower()
-    if not q:
-        return None
-    best: Optional[FAQ] = None
-    best_score = 0.0
-    for faq in db.query(FAQ).all():
-        s = _score_pair(q, faq)
-        if s > best_score:
-            best_score, best = s, faq
-    return (best, best_score) if best else None
-
-def top_k_faqs(question: str, db: Session, k: int = 3) -> List[Tuple[FAQ, float]]:
+def _score_many(qs: List[str], q_tokens: List[set[str]], snap: _Snapshot) -> np.ndarray:
+    """Full-corpus blended scores for several questions at once, shape (len(qs), n)."""
+    n = len(snap.entries)
+    if not n:
+        return np.zeros((len(qs), 0))
+
+    # One cdist call covers every question against question and (question+answer)
+    raw = process.cdist(qs, snap.choices, scorer=fuzz.token_set_ratio,
+                        dtype=np.float64, workers=_match_workers(len(qs) * len(snap.choices)))
+    fuzzy = np.maximum(raw[:, :n], raw[:, n:]) / 100.0
+
+    # Jaccard overlap via the sparse keyword matrix
+    inter = np.zeros((len(qs), n), dtype=np.int64)
+    for i, tokens in enumerate(q_tokens):
+        hits = [snap.key_postings[t] for t in tokens if t in snap.key_postings]
+        if hits:
+            inter[i] = np.bincount(np.concatenate(hits), minlength=n)
+    union = np.array([len(t) for t in q_tokens])[:, None] + snap.key_len[None, :] - inter
+    jacc = np.divide(inter, union, out=np.zeros(inter.shape), where=union > 0)
+
+    return 0.65 * fuzzy + 0.35 * jacc
+
+def _blocks(qs: List[str], n: int):
+    # Bound the (questions x FAQs) score matrix to BATCH_SCORE_CELLS
+    size = max(1, BATCH_SCORE_CELLS // max(1, 2 * n))
+    for i in range(0, len(qs), size):
+        yield qs[i:i + size]
+
+def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    # Partition to the k-th best score, then stable-sort the survivors so ties keep corpus order
+    n = len(scores)
+    if n > k:
+        kth = np.partition(scores, n - k)[n - k]
+        cand = np.flatnonzero(scores >= kth)
+    else:
+        cand = np.arange(n)
+    return cand[np.argsort(-scores[cand], kind="stable")][:k]
+
+class FAQRanking(NamedTuple):
+    best: Optional[Tuple[FAQEntry, float]]
+    top: List[Tuple[FAQEntry, float]]
+    scanned: int = 0   # FAQs actually scored
+
+def _ranking(q: str, snap: _Snapshot, scores: np.ndarray, k: int) -> FAQRanking:
+    top = [(snap.entries[i], float(scores[i])) for i in _top_rows(scores, k)]
+    best = top[0] if q and top and top[0][1] > 0 else None
+    return FAQRanking(best, top, len(scores))
+
+def _rank(q: str, q_tokens: set[str], snap: _Snapshot, k: int, prune: bool) -> FAQRanking:
+    rows = None
+    if prune and len(snap.entries) >= PRUNE_MIN_CORPUS:
+        rows = snap.candidates(q_tokens, max(PRUNE_MIN_CANDIDATES, int(PRUNE_MAX_DF * len(snap.entries))))
+        if len(rows) < max(k, PRUNE_MIN_CANDIDATES):
+            rows = None
+    scores = _score_all(q, q_tokens, snap, rows)
+    if rows is None:
+        return _ranking(q, snap, scores, k)
+    picked = _top_rows(scores, k)
+    top = [(snap.entries[i], float(scores[p])) for i, p in zip(rows[picked], picked)]
+    best = top[0] if q and top and top[0][1] > 0 else None
+    return FAQRanking(best, top, len(scores))
+
+class Retriever:
+    """Ranks the FAQs of an index snapshot for a (stripped, lowercased) question."""
+    name = ""
+
+    def prepare(self, snap: _Snapshot, base: Optional[_Snapshot] = None) -> None:
+        """Derive per-snapshot state before FAQIndex publishes `snap`, so ranking never has to.
+
+        `base` is the snapshot it replaces, for incremental updates.
+        """
+
+    def rank(self, q: str, snap: _Snapshot, k: int, prune: bool = True) -> FAQRanking:
+        raise NotImplementedError
+
+    def rank_many(self, qs: List[str], snap: _Snapshot, k: int, prune: bool = True) -> List[FAQRanking]:
+        return [self.rank(q, snap, k, prune) for q in qs]
+
+class FuzzyRetriever(Retriever):
+    """rapidfuzz + keyword Jaccard blend, with optional inverted-index pruning."""
+    name = "fuzzy"
+
+    def rank(self, q: str, snap: _Snapshot, k: int, prune: bool = True) -> FAQRanking:
+        q_tokens = _token_set(q)
+        ranking = _rank(q, q_tokens, snap, k, prune)
+        if PRUNE_VERIFY and ranking.scanned < len(snap.entries):
+            full = _rank(q, q_tokens, snap, k, prune=False)
+            if [f.id for f, _ in full.top] != [f.id for f, _ in ranking.top]:
+                log.warning("Pruned FAQ ranking differs for %r: pruned=%s exhaustive=%s", q,
+                            [(f.id, round(s, 3)) for f, s in ranking.top],
+                            [(f.id, round(s, 3)) for f, s in full.top])
+        return ranking
+
+    def rank_many(self, qs: List[str], snap: _Snapshot, k: int, prune: bool = True) -> List[FAQRanking]:
+        if prune and len(snap.entries) >= PRUNE_MIN_CORPUS:
+            # Each question has its own shortlist, so pruned ranking stays per question
+            return super().rank_many(qs, snap, k, prune)
+        out = []
+        for block in _blocks(qs, len(snap.entries)):
+            scores = _score_many(block, [_token_set(q) for q in block], snap)
+            out += [_ranking(q, snap, row, k) for q, row in zip(block, scores)]
+        return out
+
+class TfidfRetriever(Retriever):
+    """Cosine similarity over a TF-IDF matrix of question + answer + keywords.
+
+    Fitted when FAQIndex loads or swaps in a snapshot, off the event loop, and
+    kept on the snapshot. FAQs appended to the previous snapshot are transformed
+    with its vocabulary and stacked on; a full refit happens when they bring new
+    terms, exceed TFIDF_REFIT_RATIO of the fitted corpus, or the index is reloaded.
+    """
+    name = "tfidf"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _doc(e: FAQEntry) -> str:
+        return f"{e.qa_text} {e.keywords or ''}"
+
+    def prepare(self, snap: _Snapshot, base: Optional[_Snapshot] = None) -> None:
+        self._fit(snap, base)
+
+    def _fit(self, snap: _Snapshot, base: Optional[_Snapshot] = None):
+        """(vectorizer, matrix) for `snap`; only snapshots built outside FAQIndex get here unfitted."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from scipy.sparse import vstack
+
+        fit = snap.fitted.get(self.name)
+        if fit is not None:
+            return fit[:2]
+        with self._lock:
+            fit = snap.fitted.get(self.name)
+            if fit is not None:
+                return fit[:2]
+            old = base.fitted.get(self.name) if base is not None else None
+            n = len(snap.entries)
+            m = len(base.entries) if old is not None else 0
+            appended = (old is not None and old[0] is not None and 0 < m <= n
+                        and snap.entries[m - 1] is base.entries[m - 1])
+            new_docs = [self._doc(e) for e in snap.entries[m:]] if appended else []
+            if (appended and n - m <= TFIDF_REFIT_RATIO * old[2]
+                    and all(t in old[0].vocabulary_ for d in new_docs for t in _normalize(d))):
+                fit = (old[0], vstack([old[1], old[0].transform(new_docs)], format="csr"), old[2])
+            else:
+                vectorizer = TfidfVectorizer(analyzer=_normalize, sublinear_tf=True)
+                try:
+                    fit = (vectorizer, vectorizer.fit_transform([self._doc(e) for e in snap.entries]), n)
+                except ValueError:
+                    # Empty corpus or nothing but stop words
+                    fit = (None, None, 0)
+            snap.fitted[self.name] = fit
+            return fit[:2]
+
+    def rank(self, q: str, snap: _Snapshot, k: int, prune: bool = True) -> FAQRanking:
+        vectorizer, matrix = self._fit(snap)
+        if vectorizer is None:
+            return _ranking(q, snap, np.zeros(len(snap.entries)), k)
+        # Rows are L2-normalized, so a sparse dot product is the cosine similarity
+        scores = (matrix @ vectorizer.transform([q]).T).toarray().ravel()
+        return _ranking(q, snap, scores, k)
+
+    def rank_many(self, qs: List[str], snap: _Snapshot, k: int, prune: bool = True) -> List[FAQRanking]:
+        vectorizer, matrix = self._fit(snap)
+        if vectorizer is None:
+            return [_ranking(q, snap, np.zeros(len(snap.entries)), k) for q in qs]
+        out = []
+        for block in _blocks(qs, len(snap.entries)):
+            scores = (matrix @ vectorizer.transform(block).T).toarray().T
+            out += [_ranking(q, snap, row, k) for q, row in zip(block, scores)]
+        return out
+
+RETRIEVERS = {r.name: r for r in (FuzzyRetriever, TfidfRetriever)}
+
+def _make_retriever(name: str) -> Retriever:
+    if name not in RETRIEVERS:
+        raise ValueError(f"Unknown FAQ_RETRIEVER {name!r}; expected one of {sorted(RETRIEVERS)}")
+    return RETRIEVERS[name]()
+
+retriever = _make_retriever(RETRIEVER)
+
+def rank_faqs(question: str, db: Optional[Session] = None, k: int = 3, prune: bool = True,
+              snap: Optional[_Snapshot] = None) -> FAQRanking:
+    """Score the corpus once; return the best hit and the top-k (ties keep corpus order).
+
+    Ranks against `snap` when given, else the index's current snapshot.
+    """
     q = (question or "").strip().lower()
-    scored: List[Tuple[FAQ, float]] = []
-    for faq in db.query(FAQ).all():
-        scored.append((faq, _score_pair(q, faq)))
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:max(1, k)]
+    return retriever.rank(q, faq_index.snapshot(db) if snap is None else snap, max(1, k), prune)
+
+def rank_many_faqs(questions: List[str], db: Optional[Session] = None, k: int = 3,
+                   prune: bool = True) -> List[FAQRanking]:
+    """rank_faqs for many questions against one snapshot, scored in vectorized blocks."""
+    qs = [(q or "").strip().lower() for q in questions]
+    return retriever.rank_many(qs, faq_index.snapshot(db), max(1, k), prune)
+
+def best_faq(question: str, db: Optional[Session] = None) -> Optional[Tuple[FAQEntry, float]]:
+    return rank_faqs(question, db, k=1).best
+
+def top_k_faqs(question: str, db: Optional[Session] = None, k: int = 3) -> List[Tuple[FAQEntry, float]]:
+    return rank_faqs(question, db, k=k).top
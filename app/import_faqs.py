@@ -0,0 +1,33 @@
+import argparse
+import os
+
+from .db import Base, engine, SessionLocal
+from .faq_io import FAQ_IMPORT_CHUNK_SIZE, FORMATS, import_lines
+from .faq_matcher import INDEX_PATH
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk upsert FAQs from a JSONL or CSV file.")
+    parser.add_argument("path", help="file with one FAQ per JSON line, or CSV with a header row")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=FAQ_IMPORT_CHUNK_SIZE, help="rows per transaction")
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if os.path.splitext(args.path)[1].lower() == ".csv" else "jsonl")
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as fh:
+            stats = import_lines(db, fh, fmt, args.chunk_size)
+        if INDEX_PATH:
+            # Refresh the shared artifact once; running workers pick it up on restart
+            from .index_store import load_or_build
+            load_or_build(db, INDEX_PATH)
+    finally:
+        db.close()
+
+    for err in stats.errors:
+        print(f"⚠️  {err}")
+    print(f"✅ Imported FAQs: {stats.inserted} inserted, {stats.updated} updated, {stats.failed} failed")
+
+if __name__ == "__main__":
+    main()
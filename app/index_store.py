@@ -0,0 +1,136 @@
+"""On-disk FAQ index artifact, memory-mapped read-only so workers share its pages.
+
+Layout: MAGIC, u64 header length, JSON header, then 8-byte aligned raw arrays
+described in the header as name → [dtype, offset, count] (offsets relative to
+the aligned end of the header). The header carries a stamp of the `faqs`
+table (its trigger-kept revision); an artifact whose stamp no longer matches
+is rebuilt.
+"""
+import json
+import logging
+import os
+import struct
+import tempfile
+from typing import Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .models import FAQ
+from .faq_matcher import FAQEntry, _Snapshot, build_snapshot, faq_revision
+
+MAGIC = b"FAQIDX\x00\x01"
+FORMAT = 1   # bump when the tokenizer or the layout changes
+_ALIGN = 8
+
+log = logging.getLogger(__name__)
+
+def db_stamp(db: Session, revision: Optional[int] = None) -> dict:
+    """Fingerprint of the faqs table: its trigger-kept write counter, plus row count and max id."""
+    if revision is None:
+        revision = faq_revision(db)
+    count, max_id = db.query(func.count(FAQ.id), func.coalesce(func.max(FAQ.id), 0)).one()
+    return {"format": FORMAT, "revision": int(revision), "count": int(count), "max_id": int(max_id)}
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+def _csc(postings: dict[str, np.ndarray], vocab: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    lens = np.fromiter((len(postings.get(t, ())) for t in vocab), dtype=np.int64, count=len(vocab))
+    ptr = np.concatenate([[0], np.cumsum(lens)]).astype(np.int64)
+    chunks = [postings[t] for t in vocab if t in postings]
+    rows = np.concatenate(chunks).astype(np.int64) if chunks else np.empty(0, dtype=np.int64)
+    return ptr, rows
+
+def save(snap: _Snapshot, stamp: dict, path: str) -> None:
+    """Write the snapshot atomically (temp file + rename) so readers never see a partial file."""
+    vocab = sorted(set(snap.postings) | set(snap.key_postings))
+    key_ptr, key_rows = _csc(snap.key_postings, vocab)
+    tok_ptr, tok_rows = _csc(snap.postings, vocab)
+
+    fields = []
+    for e in snap.entries:
+        fields += [e.question.encode(), e.answer.encode(), (e.keywords or "").encode()]
+    text_off = np.concatenate([[0], np.cumsum([len(f) for f in fields])]).astype(np.int64)
+
+    arrays = {
+        "ids": np.asarray([e.id for e in snap.entries], dtype=np.int64),
+        "key_len": np.asarray(snap.key_len, dtype=np.int64),
+        "key_ptr": key_ptr, "key_rows": key_rows,
+        "tok_ptr": tok_ptr, "tok_rows": tok_rows,
+        "text_off": text_off,
+        "text": np.frombuffer(b"".join(fields), dtype=np.uint8),
+    }
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        layout[name] = [arr.dtype.str, offset, int(arr.size)]
+        offset += arr.nbytes + _pad(arr.nbytes)
+    header = json.dumps({"stamp": stamp, "n": len(snap.entries), "vocab": vocab, "arrays": layout}).encode()
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".faq_index.")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(prefix + b"\0" * _pad(len(prefix)))
+            for arr in arrays.values():
+                fh.write(arr.tobytes())
+                fh.write(b"\0" * _pad(arr.nbytes))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def load(path: str, stamp: Optional[dict] = None) -> Optional[_Snapshot]:
+    """Map the artifact read-only; None if it is missing, unreadable or its stamp differs."""
+    try:
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                return None
+            (hlen,) = struct.unpack("<Q", fh.read(8))
+            header = json.loads(fh.read(hlen))
+    except (OSError, ValueError, struct.error):
+        return None
+    if stamp is not None and header["stamp"] != stamp:
+        return None
+
+    start = len(MAGIC) + 8 + hlen
+    start += _pad(start)
+    buf = np.memmap(path, dtype=np.uint8, mode="r", offset=start) if os.path.getsize(path) > start else None
+
+    def arr(name: str) -> np.ndarray:
+        dtype, off, count = header["arrays"][name]
+        dtype = np.dtype(dtype)
+        if not count:
+            return np.empty(0, dtype=dtype)
+        return buf[off:off + count * dtype.itemsize].view(dtype)
+
+    ids, text_off = arr("ids").tolist(), arr("text_off").tolist()
+    raw = arr("text").tobytes()
+    field = lambda i: raw[text_off[i]:text_off[i + 1]].decode()
+    entries = [FAQEntry(ids[r], field(3 * r), field(3 * r + 1), field(3 * r + 2)) for r in range(header["n"])]
+
+    def postings(ptr_name: str, rows_name: str) -> dict[str, np.ndarray]:
+        ptr, rows = arr(ptr_name).tolist(), arr(rows_name)
+        return {t: rows[ptr[i]:ptr[i + 1]] for i, t in enumerate(header["vocab"]) if ptr[i + 1] > ptr[i]}
+
+    return _Snapshot.from_parts(entries, postings("key_ptr", "key_rows"), postings("tok_ptr", "tok_rows"), arr("key_len"))
+
+def load_or_build(db: Session, path: str, revision: Optional[int] = None) -> _Snapshot:
+    stamp = db_stamp(db, revision)
+    snap = load(path, stamp)
+    if snap is not None:
+        return snap
+    log.info("FAQ index artifact %s missing or stale; rebuilding", path)
+    snap = build_snapshot(db)
+    if faq_revision(db) != stamp["revision"]:
+        # faqs changed while the rows were read: the stamp may not describe them
+        return snap
+    try:
+        save(snap, stamp, path)
+    except OSError as e:
+        log.warning("Could not write FAQ index artifact %s: %s", path, e)
+    return snap
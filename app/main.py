@@ -1,22 +1,72 @@
-import os, re
-from fastapi import FastAPI, Depends, HTTPException
+import os, re, json, time, asyncio, base64, codecs, logging, threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, Iterable, Optional
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import inspect, literal, select, text, tuple_
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 
-from .db import Base, engine, get_db
+from .db import Base, engine, get_db, run_db, SessionLocal
 from .models import FAQ, Ticket
-from .schemas import AskRequest, AskResponse, TicketCreate, TicketOut, FAQCreate, FAQOut
-from .faq_matcher import best_faq, top_k_faqs
-from .ai import answer_with_ai
+from .schemas import AskRequest, AskBatchRequest, AskResponse, TicketCreate, TicketOut, FAQCreate, FAQOut, FAQImportResult
+from .faq_matcher import rank_faqs, rank_many_faqs, faq_index, faq_revision, _normalize
+from .ai import (answer_with_ai_async, answer_many_with_ai_async, InferenceOverloaded, warm_up, model_ready,
+                 pack_context, pending_inferences, batcher, admission, FAQ_ONLY)
+from .cache import TTLCache
+from .ticket_writer import ticket_writer
+from .ticket_dedup import ticket_index
+from . import metrics
+from .faq_io import FAQ_IMPORT_CHUNK_SIZE, ImportStats, RecordParser, upsert_chunk, export_lines
 
 Base.metadata.create_all(bind=engine)
+# create_all skips tables that already exist, so add indexes introduced since explicitly
+for _ix in Ticket.__table__.indexes:
+    _ix.create(bind=engine, checkfirst=True)
+# ... and columns (SQLite and Postgres both accept ADD COLUMN with a constant default)
+if "cluster_size" not in {c["name"] for c in inspect(engine).get_columns("tickets")}:
+    with engine.begin() as _conn:
+        _conn.execute(text("ALTER TABLE tickets ADD COLUMN cluster_size INTEGER NOT NULL DEFAULT 1"))
 
-app = FastAPI(title="Customer Support AI Agent", version="2.1.0")
+log = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if AI_WARMUP:
+        # In the background so /health answers while the model loads; /ready reports when done
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    # Runs in every server worker (lifespan starts after fork)
+    stop = threading.Event()
+    if FAQ_REVISION_POLL_S > 0:
+        threading.Thread(target=_watch_faq_revision, args=(stop,), name="faq-revision", daemon=True).start()
+    yield
+    stop.set()
+    # Flush tickets still waiting in the write-behind queue
+    ticket_writer.close()
+
+def _watch_faq_revision(stop: threading.Event) -> None:
+    """Reload this process's FAQ index and drop its cached answers when faqs changed elsewhere."""
+    while not stop.wait(FAQ_REVISION_POLL_S):
+        if not faq_index.loaded:
+            continue
+        try:
+            with SessionLocal() as db:
+                revision = faq_revision(db)
+            if revision != faq_index.revision:
+                faq_index.refresh()
+                answer_cache.clear()
+        except Exception:
+            log.exception("FAQ revision check failed")
+
+app = FastAPI(title="Customer Support AI Agent", version="2.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
 # ---------- Tunables (override via .env) ----------
@@ -24,71 +74,271 @@ FAQ_STRICT_THRESHOLD = float(os.getenv("FAQ_STRICT_THRESHOLD", "0.65"))   # stro
 AI_TRY_MIN_THRESHOLD = float(os.getenv("AI_TRY_MIN_THRESHOLD", "0.30"))   # weak/medium → try AI
 AI_CONF_THRESHOLD    = float(os.getenv("AI_CONFIDENCE_THRESHOLD", "0.60"))# AI must clear this
 TOPK_FOR_AI          = int(os.getenv("TOPK_FOR_AI", "3"))
+AI_SHED_FAQ_THRESHOLD = float(os.getenv("AI_SHED_FAQ_THRESHOLD", "0.50"))  # AI shed: medium matches above → best FAQ, below → ticket
+ANSWER_CACHE_SIZE    = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))        # 0 disables the /ask cache
+ANSWER_CACHE_TTL_S   = float(os.getenv("ANSWER_CACHE_TTL_S", "600"))
+AI_WARMUP            = os.getenv("AI_WARMUP", "0") == "1"                # preload index + model at startup
+ASK_BATCH_MAX        = int(os.getenv("ASK_BATCH_MAX_QUESTIONS", "10000"))  # per /ask/batch request
+ASK_BATCH_BLOCK_SIZE = int(os.getenv("ASK_BATCH_BLOCK_SIZE", "256"))      # questions ranked + answered per streamed block
+FAQ_REVISION_POLL_S  = float(os.getenv("FAQ_REVISION_POLL_S", "1"))      # pick up FAQ writes from other workers/processes (0 = off)
 # --------------------------------------------------
 
+# FAQ/AI answers keyed by normalized question; cleared whenever FAQs change
+answer_cache = TTLCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_S)
+
+metrics.Gauge("ai_inference_pending", "AI requests waiting for or running inference", pending_inferences)
+metrics.Gauge("ai_batch_queue_depth", "Questions queued for the QA micro-batcher", batcher.qsize)
+metrics.Gauge("ai_latency_ewma_seconds", "Recent AI latency (queueing included) used for shedding",
+              lambda: admission.latency_ewma)
+metrics.Gauge("ticket_write_queue_depth", "Tickets queued for the write-behind writer", ticket_writer.qsize)
+metrics.Gauge("ticket_dedup_index_size", "Open tickets indexed for near-duplicate coalescing",
+              lambda: len(ticket_index) if ticket_index is not None else 0)
+metrics.Gauge("answer_cache_size", "Entries in the /ask answer cache", lambda: answer_cache.stats()["size"])
+metrics.Gauge("answer_cache_hit_ratio", "Answer cache hits / lookups", lambda: answer_cache.stats()["hit_rate"])
+metrics.CounterFn("answer_cache_hits_total", "Answer cache hits", lambda: answer_cache.hits)
+metrics.CounterFn("answer_cache_misses_total", "Answer cache misses", lambda: answer_cache.misses)
+
 def looks_gibberish(q: str) -> bool:
     # no alphabetic tokens of length >= 3
     return len(re.findall(r"[A-Za-z]{3,}", q or "")) == 0
 
-def build_context_from_topk(scored_faqs, max_chars: int = 1800) -> str:
-    parts = [f"Q: {faq.question}\nA: {faq.answer}" for faq, _ in scored_faqs]
-    return "\n\n".join(parts)[:max_chars]
+def _warm_up():
+    try:
+        faq_index.snapshot()
+        if not FAQ_ONLY:
+            warm_up()
+        log.info("Warm-up complete")
+    except Exception:
+        log.exception("Warm-up failed; /ready stays unavailable")
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    # Liveness is /health; this only turns 200 once warm-up (if enabled) has finished
+    checks = {"faq_index": faq_index.loaded, "model": "disabled" if FAQ_ONLY else model_ready()}
+    if AI_WARMUP and not all(checks.values()):
+        return JSONResponse(status_code=503, content={"status": "warming_up", **checks})
+    return {"status": "ready", **checks}
+
+async def _create_ticket(question: str) -> int:
+    # Grouped with concurrent tickets into one transaction by the write-behind writer
+    return await asyncio.wrap_future(ticket_writer.submit((question, None, None)))
+
+def _cache_key(q: str) -> str:
+    return " ".join(_normalize(q))
+
+_TERMINAL = ("faq", "final")
+
 @app.post("/ask", response_model=AskResponse)
-def ask(payload: AskRequest, db: Session = Depends(get_db)):
+async def ask(payload: AskRequest, response: Response):
     q = (payload.question or "").strip()
     if not q:
         raise HTTPException(status_code=400, detail="Question required.")
+    timings = metrics.track_stages()
+    res = None
+    async for event, data in _ask_events(q):
+        if event in _TERMINAL:
+            res = data
+    if metrics.METRICS_SERVER_TIMING:
+        response.headers["Server-Timing"] = metrics.server_timing(timings)
+    return res
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_stream(payload: AskRequest):
+    """/ask as Server-Sent Events: `faq` (strong hit) or `candidates` then `final`; `error` on overload."""
+    q = (payload.question or "").strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Question required.")
+
+    async def events():
+        try:
+            async for event, data in _ask_events(q):
+                yield _sse(event, data)
+        except HTTPException as e:
+            yield _sse("error", {"status": e.status_code, "detail": e.detail})
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def _ask_events(q: str) -> AsyncIterator[tuple[str, object]]:
+    """Routing steps as they happen: ("faq", res), or ("candidates", [...]) then ("final", res)."""
+    t0 = time.perf_counter()
     # 0) Obvious gibberish → ticket
     if looks_gibberish(q):
-        t = Ticket(question=q)
-        db.add(t); db.commit(); db.refresh(t)
-        return AskResponse(
+        with metrics.stage("ticket"):
+            ticket_id = await _create_ticket(q)
+        _observe_route("gibberish", t0)
+        yield "final", AskResponse(
             answer="I couldn't confidently answer that. A support ticket has been created.",
-            source="ticket", ticket_id=t.id
+            source="ticket", ticket_id=ticket_id
         )
+        return
+
+    # Repeat questions skip matching and inference; tickets are never cached
+    key = _cache_key(q)
+    with metrics.stage("cache"):
+        cached = answer_cache.get(key) if key else None
+    if cached is not None:
+        _observe_route(cached.source, t0, cached=True)
+        yield ("faq" if cached.source == "faq" else "final"), cached
+        return
+    generation = answer_cache.generation
+    async for event, data in _answer_events(q):
+        if event in _TERMINAL:
+            _observe_route(data.source, t0)
+            # Degraded answers reflect load, not the question, so they are not cached
+            if key and data.source in ("faq", "ai") and not data.degraded:
+                answer_cache.put(key, data, generation)
+        yield event, data
 
-    # 1) Best FAQ then branch on thresholds
-    bf = best_faq(q, db)
-    if bf:
-        faq, faq_score = bf
+def _observe_route(route: str, t0: float, cached: bool = False) -> None:
+    metrics.ROUTES.inc(route=route, cached=str(cached).lower())
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - t0, route=route)
+
+async def _answer_events(q: str) -> AsyncIterator[tuple[str, object]]:
+    # 1) Rank once: best FAQ drives the thresholds, top-k feeds the AI context.
+    #    Matching runs inline on the event loop; only a cold index load touches the DB.
+    #    Rank the snapshot in hand: looking it up again could cold-load on the loop
+    #    if an invalidation landed in between.
+    snap = faq_index.current
+    if snap is None:
+        with metrics.stage("index_load"):
+            snap = await run_db(faq_index.snapshot)
+    with metrics.stage("match"):
+        ranking = rank_faqs(q, k=TOPK_FOR_AI, snap=snap)
+    metrics.FAQ_SCORE.observe(ranking.best[1] if ranking.best else 0.0)
+    degraded = None
+    if ranking.best:
+        faq, faq_score = ranking.best
 
         # 1a) Strong FAQ → return FAQ
         if faq_score >= FAQ_STRICT_THRESHOLD:
-            return AskResponse(
+            yield "faq", AskResponse(
                 answer=str(faq.answer),
                 source="faq",
                 score=round(float(faq_score), 3),
                 ticket_id=None,
             )
+            return
+
+        # 1b) AI saturated → don't queue behind it: best FAQ if close enough, else ticket
+        if faq_score >= AI_TRY_MIN_THRESHOLD and not FAQ_ONLY:
+            degraded = admission.shed_reason()
+            if degraded:
+                fallback = "faq" if faq_score >= AI_SHED_FAQ_THRESHOLD else "ticket"
+                metrics.AI_SHED.inc(reason=degraded, fallback=fallback)
+                if fallback == "faq":
+                    yield "final", AskResponse(
+                        answer=str(faq.answer),
+                        source="faq",
+                        score=round(float(faq_score), 3),
+                        degraded=degraded,
+                    )
+                    return
 
-        # 1b) Weak/medium FAQ → try AI on top-k FAQs as context
-        if faq_score >= AI_TRY_MIN_THRESHOLD:
-            topk = top_k_faqs(q, db, k=TOPK_FOR_AI)
-            context = build_context_from_topk(topk)
-            ai_ans, ai_score = answer_with_ai(q, context)
+        # 1c) Weak/medium FAQ → try AI on top-k FAQs as context (skipped in FAQ-only mode)
+        if faq_score >= AI_TRY_MIN_THRESHOLD and not FAQ_ONLY and not degraded:
+            # Provisional: streaming clients show these while the model runs
+            yield "candidates", [{"id": f.id, "question": f.question, "answer": f.answer, "score": round(float(s), 3)}
+                                 for f, s in ranking.top]
+            with metrics.stage("pack"):
+                context = pack_context(q, ranking.top)
+            try:
+                with metrics.stage("ai"):
+                    ai_ans, ai_score = await answer_with_ai_async(q, context)
+            except InferenceOverloaded:
+                metrics.ROUTES.inc(route="overloaded", cached="false")
+                raise HTTPException(status_code=503, detail="AI is busy, please retry shortly.",
+                                    headers={"Retry-After": "1"})
+            metrics.AI_SCORE.observe(ai_score)
             if ai_ans and ai_score >= AI_CONF_THRESHOLD:
-                return AskResponse(
+                yield "final", AskResponse(
                     answer=ai_ans,
                     source="ai",
                     score=round(float(ai_score), 3),
                     ticket_id=None,
                 )
+                return
 
-    # 2) No useful FAQ signal or AI not confident → ticket
-    t = Ticket(question=q)
-    db.add(t); db.commit(); db.refresh(t)
-    return AskResponse(
+    # 2) No useful FAQ signal or AI not confident (or shed) → ticket
+    with metrics.stage("ticket"):
+        ticket_id = await _create_ticket(q)
+    yield "final", AskResponse(
         answer="I couldn't confidently answer that. A support ticket has been created.",
         source="ticket",
-        ticket_id=t.id,
+        ticket_id=ticket_id,
+        degraded=degraded,
     )
 
+def _plan_block(qs: list[str], strict: float, try_min: float):
+    """Rank a block in one vectorized pass; settle strong FAQ hits, collect AI candidates."""
+    out: list[Optional[AskResponse]] = [None] * len(qs)
+    live = [i for i, q in enumerate(qs) if q and not looks_gibberish(q)]
+    ai_idx, pairs = [], []
+    for i, ranking in zip(live, rank_many_faqs([qs[i] for i in live], k=TOPK_FOR_AI)):
+        if not ranking.best:
+            continue
+        faq, faq_score = ranking.best
+        if faq_score >= strict:
+            out[i] = AskResponse(answer=str(faq.answer), source="faq", score=round(float(faq_score), 3))
+        elif faq_score >= try_min and not FAQ_ONLY:
+            ai_idx.append(i)
+            pairs.append((qs[i], pack_context(qs[i], ranking.top)))
+    return out, ai_idx, pairs
+
+async def _answer_block(qs: list[str], opts: AskBatchRequest) -> list[Optional[AskResponse]]:
+    strict = FAQ_STRICT_THRESHOLD if opts.faq_threshold is None else opts.faq_threshold
+    try_min = AI_TRY_MIN_THRESHOLD if opts.ai_min_threshold is None else opts.ai_min_threshold
+    conf = AI_CONF_THRESHOLD if opts.ai_conf_threshold is None else opts.ai_conf_threshold
+
+    out, ai_idx, pairs = await asyncio.to_thread(_plan_block, qs, strict, try_min)
+    # The AI-needing subset goes through the model in fixed-size batches
+    for i, (ai_ans, ai_score) in zip(ai_idx, await answer_many_with_ai_async(pairs)):
+        if ai_ans and ai_score >= conf:
+            out[i] = AskResponse(answer=ai_ans, source="ai", score=round(float(ai_score), 3))
+
+    unanswered = [i for i, res in enumerate(out) if res is None and qs[i]]
+    if opts.create_tickets:
+        ticket_ids = await asyncio.gather(*(_create_ticket(qs[i]) for i in unanswered))
+        answer = "I couldn't confidently answer that. A support ticket has been created."
+    else:
+        ticket_ids = [None] * len(unanswered)
+        answer = "I couldn't confidently answer that. A support ticket would be created."
+    for i, ticket_id in zip(unanswered, ticket_ids):
+        out[i] = AskResponse(answer=answer, source="ticket", ticket_id=ticket_id)
+    return out
+
+async def iter_batch_answers(questions: Iterable[str], opts: AskBatchRequest) -> AsyncIterator[dict]:
+    """Answer questions block by block, yielding one result dict per question in input order.
+
+    Bypasses the /ask cache so threshold overrides always take effect.
+    """
+    it, index = iter(questions), 0
+    while block := [(q or "").strip() for q in islice(it, max(1, ASK_BATCH_BLOCK_SIZE))]:
+        if not faq_index.loaded:
+            await run_db(faq_index.snapshot)
+        for q, res in zip(block, await _answer_block(block, opts)):
+            line = {"index": index, "question": q}
+            line.update(res.model_dump() if res else {"error": "Question required."})
+            yield line
+            index += 1
+
+@app.post("/ask/batch")
+async def ask_batch(payload: AskBatchRequest):
+    """Route many questions at once; results stream back as NDJSON, one line per question."""
+    if len(payload.questions) > ASK_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {ASK_BATCH_MAX} questions per batch.")
+
+    async def body():
+        async for line in iter_batch_answers(payload.questions, payload):
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
 # ----- Tickets & FAQs (unchanged) -----
 @app.post("/tickets", response_model=TicketOut)
 def create_ticket(payload: TicketCreate, db: Session = Depends(get_db)):
@@ -96,10 +346,56 @@ def create_ticket(payload: TicketCreate, db: Session = Depends(get_db)):
     db.add(t); db.commit(); db.refresh(t)
     return t
 
+TICKET_FIELDS = tuple(TicketOut.model_fields)
+
+def _encode_cursor(created_at: datetime, ticket_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{ticket_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        ts, tid = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(tid)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
 @app.get("/tickets", response_model=list[TicketOut])
-def list_tickets(db: Session = Depends(get_db)):
-    tickets = db.query(Ticket).order_by(Ticket.created_at.desc()).all()
-    return jsonable_encoder(tickets)
+def list_tickets(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    status: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of ticket fields"),
+    db: Session = Depends(get_db),
+):
+    """Newest first, keyset-paginated on (created_at, id); the next page's cursor is in X-Next-Cursor."""
+    wanted = TICKET_FIELDS
+    if fields:
+        wanted = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = set(wanted) - set(TICKET_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # Only the requested columns (+ the keyset columns) are read; no ORM entities are built
+    cols = dict.fromkeys(("id", "created_at", *wanted))
+    stmt = select(*(getattr(Ticket, c) for c in cols)).order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    if status:
+        stmt = stmt.where(Ticket.status == status)
+    if cursor:
+        created_at, ticket_id = _decode_cursor(cursor)
+        # Bind with the column's type so SQLite compares the same text format it stores
+        after = tuple_(literal(created_at, Ticket.created_at.type), literal(ticket_id, Ticket.id.type))
+        stmt = stmt.where(tuple_(Ticket.created_at, Ticket.id) < after)
+    rows = db.execute(stmt.limit(limit + 1)).mappings().all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    if fields:
+        # Partial rows don't fit TicketOut, so skip response_model validation
+        return JSONResponse(jsonable_encoder([{c: r[c] for c in wanted} for r in rows]), headers=headers)
+    response.headers.update(headers)
+    return [dict(r) for r in rows]
 
 @app.get("/tickets/{ticket_id}", response_model=TicketOut)
 def get_ticket(ticket_id: int, db: Session = Depends(get_db)):
@@ -110,9 +406,60 @@ def get_ticket(ticket_id: int, db: Session = Depends(get_db)):
 @app.post("/faqs", response_model=FAQOut)
 def create_faq(payload: FAQCreate, db: Session = Depends(get_db)):
     f = FAQ(question=payload.question, answer=payload.answer, keywords=payload.keywords or "")
-    db.add(f); db.commit(); db.refresh(f)
+    db.add(f); db.flush()
+    revision = faq_revision(db)   # includes this insert; the trigger's row lock keeps it ours until commit
+    db.commit(); db.refresh(f)
+    faq_index.add(f, revision)
+    answer_cache.clear()
     return f
 
+@app.post("/faqs/bulk", response_model=FAQImportResult)
+async def bulk_import_faqs(request: Request, fmt: Optional[str] = Query(None, alias="format", pattern="^(jsonl|csv)$")):
+    """Stream JSONL (default) or CSV FAQ records from the request body and upsert them in chunks."""
+    fmt = fmt or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    stats = ImportStats()
+    parser = RecordParser(fmt, stats)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")("replace")
+    chunk: list = []
+    try:
+        async for data in request.stream():
+            chunk += parser.feed(decoder.decode(data))
+            while len(chunk) >= FAQ_IMPORT_CHUNK_SIZE:
+                await run_db(upsert_chunk, chunk[:FAQ_IMPORT_CHUNK_SIZE], stats)
+                chunk = chunk[FAQ_IMPORT_CHUNK_SIZE:]
+        chunk += parser.feed(decoder.decode(b"", final=True)) + parser.close()
+        if chunk:
+            await run_db(upsert_chunk, chunk, stats)
+    finally:
+        # Matcher state is rebuilt once for the whole import, not per row; chunks
+        # already committed must reach it even if the import stops partway.
+        # /ask keeps ranking the old snapshot until the new one is swapped in.
+        try:
+            await run_db(faq_index.refresh)
+        finally:
+            answer_cache.clear()
+    return stats.as_dict()
+
+@app.get("/faqs/export")
+def export_faqs(fmt: str = Query("jsonl", alias="format", pattern="^(jsonl|csv)$")):
+    def body():
+        db = SessionLocal()
+        try:
+            yield from export_lines(db, fmt)
+        finally:
+            db.close()
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="faqs.{fmt}"'})
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats():
+    return answer_cache.stats()
+
 @app.get("/faqs", response_model=list[FAQOut])
 def list_faqs(db: Session = Depends(get_db)):
     return db.query(FAQ).all()
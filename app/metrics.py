@@ -0,0 +1,134 @@
+"""In-process metrics rendered in the Prometheus text format (no client library needed).
+
+Values are per process; with several server workers each one reports its own.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") == "1"   # add Server-Timing to /ask responses
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.65, 0.7, 0.8, 0.9, 1.0)
+
+REGISTRY: list["_Metric"] = []
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._lock = threading.Lock()
+        self._values: dict = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(self.labels, k)} {v:g}" for k, v in sorted(self._values.items())]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> list[str]:
+        out = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                running = 0
+                for le, n in zip((*self.buckets, "+Inf"), counts):
+                    running += n
+                    bucket = _labels(self.labels, key, f'le="{le}"')
+                    out.append(f"{self.name}_bucket{bucket} {running}")
+                out.append(f"{self.name}_sum{_labels(self.labels, key)} {total:g}")
+                out.append(f"{self.name}_count{_labels(self.labels, key)} {running}")
+        return out
+
+class Gauge(_Metric):
+    """Sampled from `fn` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name} {float(self.fn()):g}"]
+
+class CounterFn(Gauge):
+    """A counter kept elsewhere (e.g. cache hits), sampled at scrape time."""
+    kind = "counter"
+
+def render() -> str:
+    return "\n".join(line for m in REGISTRY for line in m.render()) + "\n"
+
+# ---------- /ask pipeline ----------
+STAGE_SECONDS = Histogram("ask_stage_seconds", "Time spent in each /ask stage", ("stage",))
+REQUEST_SECONDS = Histogram("ask_request_seconds", "End-to-end /ask latency by route", ("route",))
+ROUTES = Counter("ask_requests_total", "Answered /ask requests by route", ("route", "cached"))
+FAQ_SCORE = Histogram("ask_faq_score", "Best FAQ match score per (uncached) question", buckets=SCORE_BUCKETS)
+AI_SHED = Counter("ai_shed_total", "Medium matches answered without the AI under load", ("reason", "fallback"))
+AI_SCORE = Histogram("ask_ai_score", "AI answer confidence per inference", buckets=SCORE_BUCKETS)
+
+# ---------- Tickets ----------
+TICKETS_COALESCED = Counter("tickets_coalesced_total", "Fallback tickets attached to an open near-duplicate instead of inserted")
+
+_timings: ContextVar[Optional[list]] = ContextVar("stage_timings", default=None)
+
+def track_stages() -> list:
+    """Collect this request's stage timings (for Server-Timing) in the returned list."""
+    timings: list = []
+    _timings.set(timings)
+    return timings
+
+@contextmanager
+def stage(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+def server_timing(timings: list) -> str:
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings)
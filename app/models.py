@@ -1,6 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, event, func
+from sqlalchemy.dialects import sqlite
 from .db import Base
 
+# Same text format as SQLite's CURRENT_TIMESTAMP, so bound datetimes compare
+# correctly against server-defaulted values (keyset pagination on created_at)
+_SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 class FAQ(Base):
     __tablename__ = "faqs"
     id = Column(Integer, primary_key=True, index=True)
@@ -8,12 +15,45 @@ class FAQ(Base):
     answer = Column(Text, nullable=False)
     keywords = Column(Text, nullable=True)
 
+class FAQRevision(Base):
+    """One row, bumped by triggers on every write to `faqs` (API, CLI or plain SQL)."""
+    __tablename__ = "faq_revision"
+    id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+
+_SEED_REVISION = "INSERT INTO faq_revision (id, revision) SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM faq_revision WHERE id = 1)"
+_BUMP_REVISION = "UPDATE faq_revision SET revision = revision + 1 WHERE id = 1"
+_REVISION_DDL = {
+    "sqlite": [_SEED_REVISION] + [
+        f"CREATE TRIGGER IF NOT EXISTS faqs_revision_{op.lower()} AFTER {op} ON faqs BEGIN {_BUMP_REVISION}; END"
+        for op in ("INSERT", "UPDATE", "DELETE")
+    ],
+    "postgresql": [
+        _SEED_REVISION,
+        f"CREATE OR REPLACE FUNCTION faq_revision_bump() RETURNS trigger AS $$ BEGIN {_BUMP_REVISION}; RETURN NULL; END $$ LANGUAGE plpgsql",
+        "DROP TRIGGER IF EXISTS faqs_revision ON faqs",
+        "CREATE TRIGGER faqs_revision AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON faqs "
+        "FOR EACH STATEMENT EXECUTE FUNCTION faq_revision_bump()",
+    ],
+}
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_faq_revision(target, connection, **kw):
+    # Runs on every create_all (also when the tables already exist), so older databases get the triggers too
+    for stmt in _REVISION_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(stmt)
+
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)  
     question = Column(String, nullable=False)
     name = Column(String, nullable=True)
     email = Column(String, nullable=True)
     status = Column(String, default="open")   
-    created_at = Column(DateTime, server_default=func.now())
+    cluster_size = Column(Integer, nullable=False, default=1, server_default="1")   # questions coalesced into this ticket
+    created_at = Column(DateTime().with_variant(_SQLITE_TIMESTAMP, "sqlite"), server_default=func.now())
@@ -5,17 +5,32 @@ from datetime import datetime
 class AskRequest(BaseModel):
     question: str
 
+class AskBatchRequest(BaseModel):
+    questions: list[str]
+    create_tickets: bool = False           # False → dry run, unanswered questions are only reported
+    # Per-request threshold overrides, e.g. to replay logs against a new config
+    faq_threshold: Optional[float] = None
+    ai_min_threshold: Optional[float] = None
+    ai_conf_threshold: Optional[float] = None
+
 class AskResponse(BaseModel):
     answer: str
     source: str
     score: Optional[float] = None
     ticket_id: Optional[int] = None
+    degraded: Optional[str] = None         # set when the AI was skipped under load: "inflight" | "latency"
 
 class FAQCreate(BaseModel):
     question: str
     answer: str
     keywords: Optional[str] = None
 
+class FAQImportResult(BaseModel):
+    inserted: int
+    updated: int
+    failed: int
+    errors: list[str] = []
+
 class FAQOut(BaseModel):
     id: int
     question: str
@@ -36,6 +51,7 @@ class TicketOut(BaseModel):
     name: str | None = None
     email: str | None = None
     status: str | None = "open"
+    cluster_size: int = 1  # near-duplicate /ask questions coalesced into this ticket
     created_at: datetime   # <- let Pydantic handle datetime
 
     class Config:
@@ -0,0 +1,156 @@
+"""Preload-and-fork serving: load the FAQ index and QA model once, then fork uvicorn workers.
+
+    python -m app.serve --workers 4 --port 8000
+
+The parent imports the app, builds the FAQ index and loads the model weights
+without running inference (no torch thread pools exist before fork). It then
+freezes the GC and forks workers that accept on one shared socket. Workers map
+the same physical pages copy-on-write, so N workers cost roughly one copy of
+the weights plus their own activations. Each worker gets cores / workers torch
+intra-op threads and as many FAQ matcher threads (optionally pinned to its own
+cores). A worker that dies is replaced.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+SERVE_WORKERS            = int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1)))
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))   # 0 → available cores / workers
+SERVE_PIN_CPUS           = os.getenv("SERVE_PIN_CPUS", "0") == "1"          # pin each worker to its own cores (Linux)
+
+log = logging.getLogger("app.serve")
+
+def _available_cpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def preload() -> None:
+    """Everything workers should share: app modules, FAQ index, model weights (no inference)."""
+    from .ai import FAQ_ONLY, get_qa_model
+    from .faq_matcher import faq_index
+    from . import main  # noqa: F401  (runs table/index creation once, in the parent)
+
+    faq_index.snapshot()
+    if not FAQ_ONLY:
+        get_qa_model()
+
+def _run_worker(index: int, sock: socket.socket, threads: int, cpus: list[int], args) -> None:
+    import uvicorn
+    from .db import engine
+    from .main import app
+    from . import faq_matcher
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)   # uvicorn installs its own handlers
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    # Pooled connections opened by the parent must not be shared across processes
+    engine.dispose(close=False)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+    # rapidfuzz's default of all cores would oversubscribe them just like torch's
+    faq_matcher.MATCH_WORKERS = threads
+
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def _spawn(index: int, sock: socket.socket, threads: int, cpus: list[int], args) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 0
+    try:
+        _run_worker(index, sock, threads, cpus, args)
+    except BaseException:
+        log.exception("Worker %d crashed", index)
+        code = 1
+    finally:
+        os._exit(code)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Preload the model once and fork uvicorn workers that share it.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--threads-per-worker", type=int, default=TORCH_THREADS_PER_WORKER,
+                        help="torch intra-op and FAQ matcher threads per worker (0 = available cores / workers)")
+    parser.add_argument("--pin-cpus", action="store_true", default=SERVE_PIN_CPUS)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(message)s")
+
+    if not hasattr(os, "fork"):
+        sys.exit("app.serve needs os.fork(); use plain uvicorn on this platform")
+
+    workers = max(1, args.workers)
+    cpus = _available_cpus()
+    threads = args.threads_per_worker or max(1, len(cpus) // workers)
+    # Read by torch / OpenMP / MKL when they initialise, so set before the model loads
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    # The parent only loads weights; each worker runs its own warm-up inference after fork
+    os.environ.setdefault("AI_WARMUP", "1")
+
+    import uvicorn  # noqa: F401  (fail before forking if missing; workers share the import)
+
+    # No GC passes while preloading, then freeze what was loaded: collections in the
+    # workers would otherwise write to (and so copy) every page holding those objects
+    gc.disable()
+    preload()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    plan = {i: [cpus[(i * threads + j) % len(cpus)] for j in range(threads)] if args.pin_cpus else []
+            for i in range(workers)}
+    children = {_spawn(i, sock, threads, plan[i], args): i for i in range(workers)}
+    started = {i: time.monotonic() for i in range(workers)}
+    log.info("Serving on %s:%d with %d workers × %d torch threads", args.host, args.port, workers, threads)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        log.warning("Worker %d (pid %d) exited with status %d; restarting", index, pid, status)
+        if time.monotonic() - started[index] < 1.0:
+            time.sleep(1.0)   # don't spin on a worker that fails at startup
+        children[_spawn(index, sock, threads, plan[index], args)] = index
+        started[index] = time.monotonic()
+    sock.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+import numpy as np
+from .faq_matcher import _normalize
+
+TICKET_DEDUP            = os.getenv("TICKET_DEDUP", "1") == "1"              # coalesce near-duplicate /ask tickets
+TICKET_DEDUP_THRESHOLD  = float(os.getenv("TICKET_DEDUP_THRESHOLD", "0.7"))   # estimated shingle Jaccard to join a ticket
+TICKET_DEDUP_WINDOW_S   = float(os.getenv("TICKET_DEDUP_WINDOW_S", "3600"))   # how long a ticket keeps collecting duplicates
+TICKET_DEDUP_MAX        = int(os.getenv("TICKET_DEDUP_MAX_TICKETS", "10000")) # open tickets held in the index
+TICKET_DEDUP_PERM       = int(os.getenv("TICKET_DEDUP_PERMUTATIONS", "64"))
+TICKET_DEDUP_BANDS      = int(os.getenv("TICKET_DEDUP_BANDS", "16"))          # rows per band = permutations / bands
+
+_P = (1 << 61) - 1              # Mersenne prime: 2**61 ≡ 1 (mod p)
+_PRIME = np.uint64(_P)
+_LOW32 = np.uint64((1 << 32) - 1)
+_LOW29 = np.uint64((1 << 29) - 1)
+
+def _token_hash(token: str) -> int:
+    # Stable across processes and restarts, unlike hash()
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little")
+
+def shingles(text: str) -> set[str]:
+    """Normalized tokens plus adjacent pairs, so word order and single-word swaps count."""
+    tokens = _normalize(text)
+    return set(tokens) | {f"{x} {y}" for x, y in zip(tokens, tokens[1:])}
+
+def _mulmod(a: np.ndarray, h: np.ndarray) -> np.ndarray:
+    """(a * h) mod p for a < p and h < 2**32, element-wise, without overflowing uint64."""
+    hi, lo = a >> np.uint64(32), a & _LOW32
+    x = (hi * h) % _PRIME                                   # hi < 2**29, so hi*h < 2**61
+    x = (x >> np.uint64(29)) + ((x & _LOW29) << np.uint64(32))   # x * 2**32 mod p
+    return (x + (lo * h) % _PRIME) % _PRIME
+
+class TicketIndex:
+    """MinHash/LSH over recent open ticket questions.
+
+    A question's signature is `num_perm` min-hashes of its shingles,
+    split into `bands` LSH buckets; a lookup only compares against tickets
+    sharing a bucket, so its cost doesn't grow with the number of tickets.
+    Entries expire after `window_s` without a new duplicate.
+    """
+
+    def __init__(self, num_perm: int = TICKET_DEDUP_PERM, bands: int = TICKET_DEDUP_BANDS,
+                 threshold: float = TICKET_DEDUP_THRESHOLD, window_s: float = TICKET_DEDUP_WINDOW_S,
+                 max_items: int = TICKET_DEDUP_MAX):
+        self.bands = max(1, min(bands, num_perm))
+        self.rows = max(1, num_perm // self.bands)
+        self.threshold = threshold
+        self.window_s = window_s
+        self.max_items = max_items
+        # Fixed seed: signatures must be comparable across restarts
+        rng = np.random.default_rng(1)
+        n = self.bands * self.rows
+        # Universal hashes (a*h + b) mod p with a, b uniform in [1, p)
+        self._a = rng.integers(1, _P, n, dtype=np.uint64)
+        self._b = rng.integers(1, _P, n, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._items: OrderedDict[int, tuple[np.ndarray, float]] = OrderedDict()   # oldest first
+        self._buckets: dict[tuple[int, bytes], set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        tokens = shingles(text)
+        if not tokens:
+            return None
+        h = np.fromiter((_token_hash(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+        return ((_mulmod(self._a, h[:, None]) + self._b) % _PRIME).min(axis=0)
+
+    def similar(self, a: np.ndarray, b: np.ndarray) -> bool:
+        return float(np.mean(a == b)) >= self.threshold
+
+    def _keys(self, sig: np.ndarray) -> Iterable[tuple[int, bytes]]:
+        r = self.rows
+        return ((i, sig[i * r:(i + 1) * r].tobytes()) for i in range(self.bands))
+
+    def query(self, sig: np.ndarray) -> Optional[int]:
+        """The most similar indexed ticket above the threshold, if any."""
+        with self._lock:
+            self._expire(time.monotonic())
+            candidates = set()
+            for key in self._keys(sig):
+                candidates |= self._buckets.get(key, set())
+            best, best_sim = None, self.threshold
+            for ticket_id in candidates:
+                sim = float(np.mean(self._items[ticket_id][0] == sig))
+                if sim >= best_sim:
+                    best, best_sim = ticket_id, sim
+            return best
+
+    def add(self, ticket_id: int, sig: np.ndarray, ts: Optional[float] = None) -> None:
+        with self._lock:
+            self._discard(ticket_id)
+            self._items[ticket_id] = (sig, time.monotonic() if ts is None else ts)
+            for key in self._keys(sig):
+                self._buckets.setdefault(key, set()).add(ticket_id)
+            self._expire(time.monotonic())
+
+    def touch(self, ticket_id: int) -> None:
+        """A duplicate just joined: keep the ticket collecting for another window."""
+        with self._lock:
+            if ticket_id in self._items:
+                self._items[ticket_id] = (self._items[ticket_id][0], time.monotonic())
+                self._items.move_to_end(ticket_id)
+
+    def discard(self, ticket_id: int) -> None:
+        with self._lock:
+            self._discard(ticket_id)
+
+    def _discard(self, ticket_id: int) -> None:
+        entry = self._items.pop(ticket_id, None)
+        if entry is None:
+            return
+        for key in self._keys(entry[0]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(ticket_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _expire(self, now: float) -> None:
+        while self._items:
+            ticket_id, (_, ts) = next(iter(self._items.items()))
+            if now - ts <= self.window_s and len(self._items) <= self.max_items:
+                break
+            self._discard(ticket_id)
+
+ticket_index = TicketIndex() if TICKET_DEDUP else None
@@ -0,0 +1,104 @@
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import literal, select, update
+from .batching import MicroBatcher
+from .db import SessionLocal
+from .models import Ticket
+from .ticket_dedup import ticket_index, TICKET_DEDUP_WINDOW_S, TICKET_DEDUP_MAX
+from . import metrics
+
+TICKET_BATCH_MAX_SIZE    = int(os.getenv("TICKET_BATCH_MAX_SIZE", "64"))
+TICKET_BATCH_MAX_WAIT_MS = float(os.getenv("TICKET_BATCH_MAX_WAIT_MS", "5"))
+
+class TicketWriter(MicroBatcher):
+    """Write-behind ticket inserts: one transaction per batch, each caller gets its ticket id.
+
+    Items are (question, name, email). Ids are read back after the flush, so
+    callers still receive the real primary key of their row. Anonymous
+    questions that nearly duplicate a recent open ticket (or each other) join
+    that ticket and bump its cluster_size instead of adding a row.
+    """
+    name = "ticket-writer"
+
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        super().__init__(max_batch, max_wait_ms)
+        self._seeded = False
+
+    def _seed(self, db) -> None:
+        """Index open tickets from the last window, so a restart doesn't split ongoing clusters."""
+        self._seeded = True
+        since = datetime.utcnow() - timedelta(seconds=TICKET_DEDUP_WINDOW_S)
+        stmt = (select(Ticket.id, Ticket.question, Ticket.created_at)
+                .where(Ticket.status == "open", Ticket.name.is_(None), Ticket.email.is_(None),
+                       Ticket.created_at >= literal(since, Ticket.created_at.type))
+                .order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(TICKET_DEDUP_MAX))
+        now, utcnow = time.monotonic(), datetime.utcnow()
+        for ticket_id, question, created_at in reversed(db.execute(stmt).all()):
+            sig = ticket_index.signature(question)
+            if sig is not None:
+                ticket_index.add(ticket_id, sig, now - (utcnow - created_at).total_seconds())
+
+    def _process(self, items: list) -> list:
+        db = SessionLocal()
+        try:
+            if ticket_index is not None and not self._seeded:
+                self._seed(db)
+            sigs = [ticket_index.signature(q) if ticket_index is not None and name is None and email is None
+                    else None for q, name, email in items]
+            # Each item joins an indexed ticket, or a new row shared with its near-duplicates in this batch
+            attach: dict[int, list[int]] = {}
+            new: list[list[int]] = []
+            for i, sig in enumerate(sigs):
+                ticket_id = ticket_index.query(sig) if sig is not None else None
+                if ticket_id is not None:
+                    attach.setdefault(ticket_id, []).append(i)
+                    continue
+                for group in new:
+                    first = sigs[group[0]]
+                    if sig is not None and first is not None and ticket_index.similar(sig, first):
+                        group.append(i)
+                        break
+                else:
+                    new.append([i])
+
+            ids = [None] * len(items)
+            bumped = []
+            for ticket_id, members in attach.items():
+                res = db.execute(update(Ticket).where(Ticket.id == ticket_id, Ticket.status == "open")
+                                 .values(cluster_size=Ticket.cluster_size + len(members)))
+                if res.rowcount:
+                    bumped.append(ticket_id)
+                    for i in members:
+                        ids[i] = ticket_id
+                else:
+                    # Closed or deleted since it was indexed
+                    ticket_index.discard(ticket_id)
+                    new.append(members)
+
+            rows = [Ticket(question=items[g[0]][0], name=items[g[0]][1], email=items[g[0]][2], cluster_size=len(g))
+                    for g in new]
+            db.add_all(rows)
+            db.flush()
+            for group, row in zip(new, rows):
+                for i in group:
+                    ids[i] = row.id
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        # Only once committed, so the index never points at a rolled-back row
+        for ticket_id in bumped:
+            ticket_index.touch(ticket_id)
+        for group in new:
+            if sigs[group[0]] is not None:
+                ticket_index.add(ids[group[0]], sigs[group[0]])
+        coalesced = len(items) - len(rows)
+        if coalesced:
+            metrics.TICKETS_COALESCED.inc(coalesced)
+        return ids
+
+ticket_writer = TicketWriter(TICKET_BATCH_MAX_SIZE, TICKET_BATCH_MAX_WAIT_MS)
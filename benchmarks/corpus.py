@@ -0,0 +1,88 @@
+"""Seeded synthetic FAQ corpora and question workloads.
+
+The same (size, seed) always yields the same FAQs and questions, so reports
+from different commits measure identical inputs.
+"""
+import random
+import string
+
+ACTIONS = ["cancel", "change", "update", "reset", "track", "return", "refund", "upgrade", "downgrade", "pause",
+           "renew", "transfer", "verify", "activate", "deactivate", "export", "import", "delete", "restore", "share",
+           "download", "install", "configure", "connect", "disconnect", "replace", "repair", "schedule", "reschedule",
+           "merge", "split", "rename", "report", "dispute", "redeem", "apply", "remove", "add", "link", "unlink"]
+OBJECTS = ["order", "subscription", "password", "account", "invoice", "payment method", "shipping address",
+           "delivery", "warranty", "gift card", "coupon", "profile", "email address", "phone number", "plan",
+           "device", "router", "license", "api key", "workspace", "team", "billing cycle", "refund request",
+           "return label", "loyalty points", "membership", "booking", "reservation", "ticket", "package",
+           "tracking number", "credit card", "bank account", "tax form", "receipt", "data export", "backup",
+           "two-factor login", "notification settings", "privacy settings", "language", "time zone", "avatar",
+           "username", "store credit", "pre-order", "bundle", "add-on", "trial", "seat", "domain", "certificate",
+           "firmware", "mobile app", "browser extension", "printer", "calendar", "contact list", "wishlist", "cart"]
+QUALIFIERS = ["online", "from the app", "after checkout", "before shipping", "outside business hours",
+              "without a receipt", "on a weekend", "internationally", "for a family member", "in bulk",
+              "after 30 days", "with a promo code", "on mobile", "from another country", "twice", "for free",
+              "without logging in", "during a sale", "for my team", "at the store"]
+TEMPLATES = ["How do I {a} my {o}?", "Can I {a} my {o} {q}?", "How can I {a} the {o}?",
+             "Is it possible to {a} a {o} {q}?", "What happens if I {a} my {o}?", "Where do I {a} my {o}?",
+             "How long does it take to {a} my {o}?", "Why can't I {a} my {o} {q}?",
+             "Who do I contact to {a} my {o}?", "What do I need to {a} my {o} {q}?"]
+ANSWERS = ["Go to Settings > {O} and choose {A}. Changes apply immediately.",
+           "You can {a} your {o} from the account page; it usually takes 1-2 business days.",
+           "Contact support with your order number and we will {a} the {o} for you.",
+           "Yes. Open the {o} details, select {A} and confirm by email.",
+           "This is only possible {q}; otherwise our team has to {a} the {o} manually."]
+OUT_OF_DOMAIN = ["what is the capital of australia", "recommend a good pasta recipe", "who won the football game",
+                 "how tall is mount everest", "translate hello into japanese", "write me a poem about rain",
+                 "what is the meaning of life", "how do airplanes stay in the air", "best hiking trails nearby",
+                 "explain quantum entanglement simply", "what time is sunset today", "tips for learning guitar"]
+TYPOS = {"a": "s", "e": "r", "i": "o", "o": "p", "u": "y", "s": "a", "t": "r", "n": "m"}
+
+def make_faqs(n: int, seed: int = 0) -> list[dict]:
+    """`n` distinct FAQ rows (question, answer, keywords)."""
+    rng = random.Random(seed)
+    combos = [(t, a, o, q) for t in TEMPLATES for a in ACTIONS for o in OBJECTS
+              for q in (QUALIFIERS if "{q}" in t else [""])]
+    if n > len(combos):
+        raise ValueError(f"At most {len(combos)} distinct synthetic FAQs")
+    rows = []
+    for t, a, o, q in rng.sample(combos, n):
+        answer = rng.choice(ANSWERS).format(a=a, o=o, q=q, A=a.title(), O=o.title())
+        rows.append({"question": t.format(a=a, o=o, q=q),
+                     "answer": answer, "keywords": ",".join([a, *o.split()])})
+    return rows
+
+def _paraphrase(rng: random.Random, question: str) -> str:
+    words = question.rstrip("?").lower().split()
+    words = [w for w in words if rng.random() > 0.2] or words       # drop some words
+    if len(words) > 3 and rng.random() < 0.5:                       # swap a neighbouring pair
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    w = rng.randrange(len(words))                                   # one typo
+    word = words[w]
+    if len(word) > 3:
+        c = rng.randrange(len(word))
+        words[w] = word[:c] + TYPOS.get(word[c], word[c]) + word[c + 1:]
+    return " ".join(rng.choice([["please"], ["hi,"], []]) + words)
+
+def _gibberish(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        return "".join(rng.choice(string.punctuation + string.digits + " ") for _ in range(rng.randint(3, 20)))
+    if kind < 0.7:
+        return " ".join(rng.choice(["??", "!!", "ok", "hm", "x", "k"]) for _ in range(rng.randint(1, 4)))
+    return " ".join("".join(rng.choice("bcdfghjklmnpqrstvwxz") for _ in range(rng.randint(3, 8)))
+                    for _ in range(rng.randint(1, 3)))
+
+WORKLOADS = ("exact", "paraphrased", "gibberish", "out_of_domain")
+
+def make_questions(faqs: list[dict], n: int, seed: int = 0) -> dict[str, list[str]]:
+    """`n` questions per workload, drawn from (or unrelated to) `faqs`."""
+    rng = random.Random(seed + 1)
+    picks = [rng.choice(faqs)["question"] for _ in range(n)]
+    return {
+        "exact": picks,
+        "paraphrased": [_paraphrase(rng, q) for q in picks],
+        "gibberish": [_gibberish(rng) for _ in range(n)],
+        "out_of_domain": [f"{rng.choice(OUT_OF_DOMAIN)} {rng.choice(['?', 'please', 'now', ''])}".strip()
+                          for _ in range(n)],
+    }
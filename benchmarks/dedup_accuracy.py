@@ -0,0 +1,65 @@
+"""Ticket dedup accuracy: MinHash estimates must track true shingle Jaccard.
+
+    python -m benchmarks.dedup_accuracy              # exit 1 when estimates drift
+    python -m benchmarks.dedup_accuracy --pairs 5000 --seed 3
+
+Pairs of random questions with a controlled overlap are signed by
+app.ticket_dedup.TicketIndex and compared against exact Jaccard.
+"""
+import argparse
+import json
+import random
+import sys
+
+MAX_MEAN_ERROR = 0.05   # mean |estimate - Jaccard|; 64 permutations give ~0.05 at J = 0.5
+FALSE_MERGE_BELOW = 0.5  # pairs this dissimilar must never clear the merge threshold
+
+def make_pairs(n: int, seed: int) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(5000)]
+    pairs = []
+    for _ in range(n):
+        words = rng.sample(vocab, rng.randint(4, 14))
+        other = [w if rng.random() > rng.random() else rng.choice(vocab) for w in words]
+        pairs.append((" ".join(words), " ".join(other)))
+    return pairs
+
+def measure(pairs: list[tuple[str, str]]) -> dict:
+    from app.ticket_dedup import TicketIndex, shingles
+
+    index = TicketIndex()
+    errors, false_merges, missed = [], 0, 0
+    for x, y in pairs:
+        a, b = shingles(x), shingles(y)
+        true = len(a & b) / len(a | b)
+        est = float((index.signature(x) == index.signature(y)).mean())
+        errors.append(abs(est - true))
+        if true < FALSE_MERGE_BELOW and est >= index.threshold:
+            false_merges += 1
+        if true >= index.threshold + 0.15 and est < index.threshold:
+            missed += 1
+    return {"pairs": len(pairs), "mean_abs_error": round(sum(errors) / len(errors), 4),
+            "max_abs_error": round(max(errors), 4), "false_merges": false_merges, "missed_merges": missed,
+            "threshold": index.threshold}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = measure(make_pairs(args.pairs, args.seed))
+    print(json.dumps(result, indent=2))
+    problems = []
+    if result["mean_abs_error"] > MAX_MEAN_ERROR:
+        problems.append(f"mean |estimate - Jaccard| is {result['mean_abs_error']} (max {MAX_MEAN_ERROR})")
+    if result["false_merges"]:
+        problems.append(f"{result['false_merges']} pairs with Jaccard < {FALSE_MERGE_BELOW} would be merged")
+    for p in problems:
+        print(f"❌ {p}", file=sys.stderr)
+    if problems:
+        sys.exit(1)
+    print("✅ Dedup estimates OK", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
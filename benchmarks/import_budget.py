@@ -0,0 +1,69 @@
+"""Import-time budget: `import app.main` must stay fast and must not load the ML stack.
+
+    python -m benchmarks.import_budget                    # exit 1 when over budget
+    python -m benchmarks.import_budget --budget-ms 800 --repeat 7
+
+Each sample is a fresh interpreter, so nothing is warm in sys.modules.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+HEAVY_MODULES = ("transformers", "torch", "onnxruntime", "optimum", "sklearn", "scipy")
+
+_PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"ms": ms, "heavy": sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)}}))
+"""
+
+def measure(repeat: int = 5, faq_only: bool = False) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples, heavy = [], set()
+    with tempfile.TemporaryDirectory(prefix="import-budget-") as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'probe.db')}", "AI_WARMUP": "0"}
+        if faq_only:
+            env["FAQ_ONLY"] = "1"
+        for _ in range(max(1, repeat)):
+            proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=root, env=env, capture_output=True, text=True)
+            if proc.returncode:
+                raise RuntimeError(f"import app.main failed: {proc.stderr.strip().splitlines()[-1]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            samples.append(result["ms"])
+            heavy.update(result["heavy"])
+    return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1),
+            "heavy_modules": sorted(heavy)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--faq-only", action="store_true", help="measure with FAQ_ONLY=1")
+    args = parser.parse_args()
+
+    try:
+        result = measure(args.repeat, args.faq_only)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, indent=2))
+    problems = []
+    if result["median_ms"] > args.budget_ms:
+        problems.append(f"import app.main took {result['median_ms']} ms (budget {args.budget_ms:g} ms)")
+    if result["heavy_modules"]:
+        problems.append(f"import app.main loaded {', '.join(result['heavy_modules'])}")
+    for p in problems:
+        print(f"❌ {p}", file=sys.stderr)
+    if problems:
+        sys.exit(1)
+    print("✅ Import budget OK", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
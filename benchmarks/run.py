@@ -0,0 +1,258 @@
+"""Benchmark the FAQ matcher and the /ask pipeline on synthetic corpora.
+
+    python -m benchmarks.run                       # 100, 1k, 10k, 100k FAQs
+    python -m benchmarks.run --sizes 100 1000 --out bench.json
+    python -m benchmarks.run --baseline old.json   # also print changes vs an earlier report
+
+Runs against a throwaway SQLite DB and a stubbed QA model, so only this
+service's own code is measured. Reports are JSON with stable keys, meant to be
+diffed between commits.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .corpus import WORKLOADS, make_faqs, make_questions
+from .import_budget import measure as measure_import
+
+DEFAULT_SIZES = (100, 1000, 10_000, 100_000)
+
+def _pct(samples: list[float], p: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] if s else 0.0
+
+def latency_summary(samples: list[float]) -> dict:
+    """Milliseconds; samples are seconds."""
+    total = sum(samples)
+    return {
+        "n": len(samples),
+        "qps": round(len(samples) / total, 1) if total else 0.0,
+        "mean_ms": round(1000 * total / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(1000 * _pct(samples, 50), 3),
+        "p95_ms": round(1000 * _pct(samples, 95), 3),
+        "p99_ms": round(1000 * _pct(samples, 99), 3),
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return ""
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class StubQA:
+    """Stands in for the transformers pipeline: fixed per-batch delay, answer taken from the context.
+
+    It has no tokenizer, so pack_context uses its character cap.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000.0
+
+    def _one(self, context: str) -> dict:
+        answer = context.split("A: ", 1)[-1].split("\n", 1)[0]
+        return {"answer": answer[:80], "score": 0.5 + (len(answer) % 50) / 100.0}
+
+    def __call__(self, question=None, context=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(context, list):
+            return [self._one(c) for c in context]
+        return self._one(context)
+
+def load_corpus(size: int, seed: int) -> list[dict]:
+    from sqlalchemy import delete, insert
+    from app.db import SessionLocal
+    from app.faq_matcher import faq_index
+    from app.models import FAQ
+
+    faqs = make_faqs(size, seed)
+    with SessionLocal() as db:
+        db.execute(delete(FAQ))
+        db.execute(insert(FAQ), faqs)
+        db.commit()
+    faq_index.invalidate()
+    return faqs
+
+def bench_index(repeat: int) -> dict:
+    from app.faq_matcher import faq_index
+
+    builds = []
+    for _ in range(repeat):
+        faq_index.invalidate()
+        gc.collect()
+        t0 = time.perf_counter()
+        faq_index.snapshot()
+        builds.append(time.perf_counter() - t0)
+
+    # Separate pass: tracemalloc slows allocation-heavy code down
+    faq_index.invalidate()
+    gc.collect()
+    tracemalloc.start()
+    faq_index.snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    build = {k: v for k, v in latency_summary(builds).items() if k != "qps"}
+    return {"build": build, "index_mb": round(current / 2**20, 2),
+            "build_peak_mb": round(peak / 2**20, 2)}
+
+def bench_matcher(questions: dict[str, list[str]]) -> dict:
+    from app.faq_matcher import best_faq, top_k_faqs, rank_many_faqs
+
+    out = {}
+    for name in WORKLOADS:
+        qs = questions[name]
+        res = {}
+        for label, fn in (("best_faq", lambda q: best_faq(q)), ("top_k_faqs", lambda q: top_k_faqs(q, k=3))):
+            samples = []
+            for q in qs:
+                t0 = time.perf_counter()
+                fn(q)
+                samples.append(time.perf_counter() - t0)
+            res[label] = latency_summary(samples)
+        t0 = time.perf_counter()
+        rank_many_faqs(qs, k=3)
+        elapsed = time.perf_counter() - t0
+        res["rank_many_qps"] = round(len(qs) / elapsed, 1) if elapsed else 0.0
+        out[name] = res
+    return out
+
+async def bench_ask(questions: dict[str, list[str]], concurrency: int) -> dict:
+    import httpx
+    from app.main import app
+
+    routes: dict[str, dict[str, int]] = {}
+    out = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(q: str, workload: str, samples: list):
+            t0 = time.perf_counter()
+            r = await client.post("/ask", json={"question": q})
+            samples.append(time.perf_counter() - t0)
+            src = r.json().get("source", "error") if r.status_code == 200 else f"http_{r.status_code}"
+            routes.setdefault(workload, {}).setdefault(src, 0)
+            routes[workload][src] += 1
+
+        for name in WORKLOADS:
+            samples: list[float] = []
+            sem = asyncio.Semaphore(max(1, concurrency))
+
+            async def bounded(q):
+                async with sem:
+                    await one(q, name, samples)
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(bounded(q) for q in questions[name]))
+            wall = time.perf_counter() - t0
+            summary = latency_summary(samples)
+            summary["qps"] = round(len(samples) / wall, 1) if wall else 0.0   # throughput at this concurrency
+            out[name] = {**summary, "routes": dict(sorted(routes.get(name, {}).items()))}
+    return out
+
+def compare(report: dict, baseline: dict) -> list[str]:
+    """Human-readable ratios for every numeric leaf present in both reports."""
+    lines = []
+
+    def walk(new, old, path):
+        if isinstance(new, dict) and isinstance(old, dict):
+            for k in new:
+                if k in old and k not in ("meta", "routes"):
+                    walk(new[k], old[k], path + [k])
+        elif isinstance(new, (int, float)) and isinstance(old, (int, float)) and old:
+            if path[-1].endswith("_ms") or path[-1].endswith("qps") or path[-1].endswith("_mb"):
+                lines.append(f"{'.'.join(path)}: {old} → {new} ({new / old:.2f}x)")
+
+    walk(report, baseline, [])
+    return lines
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="FAQ corpus sizes")
+    parser.add_argument("--questions", type=int, default=100, help="questions per workload")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent /ask requests")
+    parser.add_argument("--ai-latency-ms", type=float, default=20.0, help="stub model delay per inference batch")
+    parser.add_argument("--index-repeat", type=int, default=3, help="index builds timed per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-ask", action="store_true", help="matcher only")
+    parser.add_argument("--cache", action="store_true", help="keep the /ask answer cache on (default: off)")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    # Before any app import: private DB, no cache unless asked
+    tmp = tempfile.mkdtemp(prefix="faq-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    if not args.cache:
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+    os.environ.setdefault("AI_WARMUP", "0")
+
+    import app.ai as ai
+    from app.db import Base, engine
+    from app import faq_matcher, main as app_main
+
+    # Stub under get_qa_model's cache so everything calling it gets the stub
+    stub = StubQA(args.ai_latency_ms)
+    ai.build_pipeline = lambda *a, **k: stub
+    ai.get_qa_model.cache_clear()
+    Base.metadata.create_all(bind=engine)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+            "config": {
+                "retriever": faq_matcher.RETRIEVER,
+                "prune_min_corpus": faq_matcher.PRUNE_MIN_CORPUS,
+                "prune_max_df": faq_matcher.PRUNE_MAX_DF,
+                "faq_strict_threshold": app_main.FAQ_STRICT_THRESHOLD,
+                "ai_try_min_threshold": app_main.AI_TRY_MIN_THRESHOLD,
+                "ai_conf_threshold": app_main.AI_CONF_THRESHOLD,
+                "topk_for_ai": app_main.TOPK_FOR_AI,
+                "ai_batch_max_size": ai.AI_BATCH_MAX_SIZE,
+            },
+        },
+        "import": measure_import(),
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"… {size} FAQs", file=sys.stderr)
+        faqs = load_corpus(size, args.seed)
+        questions = make_questions(faqs, args.questions, args.seed)
+        entry = {"index": bench_index(args.index_repeat), "matcher": bench_matcher(questions)}
+        if not args.skip_ask:
+            entry["ask"] = asyncio.run(bench_ask(questions, args.concurrency))
+        entry["max_rss_mb"] = _rss_mb()
+        report["sizes"][str(size)] = entry
+
+    app_main.ticket_writer.close()
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+        print(f"✅ Report written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            for line in compare(report, json.load(fh)):
+                print(line, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,55 @@
-
 const API = localStorage.getItem("BASE_URL") || "https://web-production-b381e.up.railway.app/";
+
+// Reads a text/event-stream body, calling onEvent(name, data) for each event
+async function readEvents(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buf.indexOf("\n\n")) >= 0) {
+      const block = buf.slice(0, sep);
+      buf = buf.slice(sep + 2);
+      let event = "message", data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 document.getElementById("ask").addEventListener("click", async () => {
   const q = document.getElementById("q").value.trim();
   if (!q) return;
   const out = document.getElementById("out");
   out.textContent = "Thinking...";
   try {
-    const r = await fetch(`${API}/ask`, {
+    const init = {
       method: "POST",
       headers: {"Content-Type":"application/json"},
       body: JSON.stringify({question: q})
+    };
+    const r = await fetch(`${API}/ask/stream`, init);
+    if (r.status === 404) {
+      // Older API without streaming
+      const data = await (await fetch(`${API}/ask`, init)).json();
+      out.textContent = JSON.stringify(data, null, 2);
+      return;
+    }
+    await readEvents(r, (event, data) => {
+      if (event === "candidates") {
+        out.textContent = "Trying AI on:\n" + data.map(c => `- ${c.question} (${c.score})`).join("\n");
+      } else if (event === "error") {
+        out.textContent = "API error: " + data.detail;
+      } else {
+        out.textContent = JSON.stringify(data, null, 2);
+      }
     });
-    const data = await r.json();
-    out.textContent = JSON.stringify(data, null, 2);
   } catch (e) {
     out.textContent = "API error: " + e;
   }
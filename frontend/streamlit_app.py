@@ -1,7 +1,15 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 import os
 
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "16"))       # keep-alive connections to the API, shared by all sessions
+TICKETS_TTL_S = float(os.getenv("TICKETS_TTL_S", "10"))     # how long the sidebar ticket list is reused
+
 # ── MUST be first Streamlit call ───────────────────────────────────────────────
 st.set_page_config(page_title="Support AI Agent", page_icon="💬", layout="wide")
 
@@ -9,13 +17,92 @@ st.set_page_config(page_title="Support AI Agent", page_icon="💬", layout="wide
 def get_base_url():
     return st.session_state.get("base_url") or os.getenv("BASE_URL", "https://web-production-b381e.up.railway.app/")
 
+@st.cache_resource
+def http_session() -> requests.Session:
+    """One pooled keep-alive session for every rerun and browser session of this server."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 def api_post(path: str, json: dict):
     url = f"{get_base_url()}{path}"
-    return requests.post(url, json=json, timeout=30)
+    return http_session().post(url, json=json, timeout=30)
+
+def api_get(path: str, params: dict | None = None):
+    url = f"{get_base_url()}{path}"
+    return http_session().get(url, params=params, timeout=30)
+
+class TicketFeed:
+    """Open tickets per API URL, shared by all sessions and refreshed off the script thread.
 
-def api_get(path: str):
+    `get` returns whatever is cached (possibly stale, None before the first
+    fetch) and starts at most one background refresh once it is older than
+    `ttl_s`; the returned Future resolves to the fresh list.
+    """
+
+    def __init__(self, session: requests.Session, ttl_s: float):
+        self.session, self.ttl_s = session, ttl_s
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tickets")
+        self._cached: dict[str, tuple[float, list | None]] = {}
+        self._pending: dict[str, Future] = {}
+
+    def _fetch(self, base_url: str) -> list | None:
+        try:
+            # Only the 10 newest open tickets, and only the columns shown in the sidebar
+            r = self.session.get(f"{base_url}/tickets", timeout=30,
+                                 params={"status": "open", "limit": 10, "fields": "id,question,status,name,cluster_size"})
+            tickets = r.json() if r.ok else None
+        except Exception:
+            tickets = None
+        with self._lock:
+            self._cached[base_url] = (time.monotonic(), tickets)
+            self._pending.pop(base_url, None)
+        return tickets
+
+    def get(self, base_url: str) -> tuple[list | None, Future | None]:
+        with self._lock:
+            fetched_at, tickets = self._cached.get(base_url, (None, None))
+            if fetched_at is not None and time.monotonic() - fetched_at < self.ttl_s:
+                return tickets, None
+            fut = self._pending.get(base_url)
+            if fut is None:
+                fut = self._pending[base_url] = self._executor.submit(self._fetch, base_url)
+            return tickets, fut
+
+    def invalidate(self, base_url: str) -> None:
+        """Call after creating a ticket so the next render refetches."""
+        with self._lock:
+            if base_url in self._cached:
+                self._cached[base_url] = (None, self._cached[base_url][1])
+
+@st.cache_resource
+def ticket_feed() -> TicketFeed:
+    return TicketFeed(http_session(), TICKETS_TTL_S)
+
+def api_stream(path: str, payload: dict):
+    """POST to an SSE endpoint and yield (event, data) as each event arrives."""
     url = f"{get_base_url()}{path}"
-    return requests.get(url, timeout=30)
+    with http_session().post(url, json=payload, stream=True, timeout=30) as r:
+        if r.status_code == 404:
+            # Older API without streaming → one blocking call
+            r = api_post("/ask", payload)
+            yield ("final", r.json()) if r.ok else ("error", {"detail": r.text})
+            return
+        if not r.ok:
+            yield "error", {"detail": r.text}
+            return
+        event, data = "message", []
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and data:
+                yield event, json.loads("\n".join(data))
+                event, data = "message", []
 
 def source_badge(source: str) -> str:
     s = (source or "").lower()
@@ -201,34 +288,35 @@ with st.sidebar:
     st.markdown("---")
     st.subheader("📨 Open Tickets")
 
-    # Load tickets function so we can refresh on demand
-    def load_tickets():
-        try:
-            r = api_get("/tickets")
-            if r.ok:
-                return r.json()
-        except Exception:
-            return None
-        return None
-
-    tickets = load_tickets()
+    # Cached (possibly stale) list right away; a refresh, if due, runs while the chat renders
+    tickets, tickets_refresh = ticket_feed().get(base_url)
+    tickets_box = st.empty()
 
-    if tickets is None:
-        st.warning("Tickets unavailable. Check API URL.")
-    elif not tickets:
-        st.caption("No open tickets.")
+    def render_tickets(tickets):
+        with tickets_box.container():
+            if tickets is None:
+                st.warning("Tickets unavailable. Check API URL.")
+            elif not tickets:
+                st.caption("No open tickets.")
+            else:
+                for t in tickets:
+                    # Handle projects where 'status' field doesn't exist by defaulting to 'open'
+                    status = t.get("status", "open")
+                    name = t.get("name") or "N/A"
+                    question = (t.get("question") or "").strip()
+                    short_q = (question[:60] + "…") if len(question) > 60 else question
+                    # Near-duplicate /ask questions are coalesced into one ticket
+                    count = t.get("cluster_size") or 1
+                    st.write(f"**#{t['id']}** — {short_q}" + (f"  ·  ×{count}" if count > 1 else ""))
+                    st.caption(f"Status: {status}  |  From: {name}")
+                    st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
+
+    if tickets is not None or tickets_refresh is None:
+        render_tickets(tickets)
     else:
-        for t in tickets[:10]:
-            # Handle projects where 'status' field doesn't exist by defaulting to 'open'
-            status = t.get("status", "open")
-            name = t.get("name") or "N/A"
-            question = (t.get("question") or "").strip()
-            short_q = (question[:60] + "…") if len(question) > 60 else question
-            st.write(f"**#{t['id']}** — {short_q}")
-            st.caption(f"Status: {status}  |  From: {name}")
-            st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
-
-    st.button("↻ Refresh tickets", on_click=lambda: None)
+        tickets_box.caption("Loading tickets…")
+
+    st.button("↻ Refresh tickets", on_click=lambda: ticket_feed().invalidate(base_url))
 
     st.markdown("---")
     st.subheader("📝 Create Manual Ticket")
@@ -241,6 +329,7 @@ with st.sidebar:
             try:
                 resp = api_post("/tickets", {"question": q.strip(), "name": name or None, "email": email or None})
                 if resp.ok:
+                    ticket_feed().invalidate(base_url)
                     st.success(f"Ticket #{resp.json()['id']} created.")
                     # soft refresh by re-running app so sidebar shows new ticket
                     st.rerun()
@@ -262,40 +351,7 @@ with col_right:
         st.session_state.history = []
         st.rerun()
 
-# Chat input
-user_input = st.chat_input("Type your question…")
-if user_input:
-    st.session_state.history.append(("user", user_input))
-    with st.spinner("Thinking…"):
-        try:
-            r = api_post("/ask", {"question": user_input})
-            if r.ok:
-                res = r.json()
-                source = res.get("source")
-                score = res.get("score")
-                ticket_id = res.get("ticket_id")
-                ans = res.get("answer") or ""
-
-                # Build meta line with badge and numbers
-                meta_bits = [source_badge(source)]
-                if score is not None:
-                    meta_bits.append(f"<span class='small'>score: {score:.3f}</span>")
-                if ticket_id:
-                    meta_bits.append(f"<span class='small'>ticket: #{ticket_id}</span>")
-                meta_html = " ".join(meta_bits)
-
-                st.session_state.history.append(("bot", ans, meta_html))
-
-                # If a ticket was created, re-run so the sidebar refreshes
-                if source == "ticket":
-                    st.rerun()
-            else:
-                st.session_state.history.append(("bot", f"API error: {r.text}", "<span class='badge' style='background:#f59e0b'>ERROR</span>"))
-        except Exception as e:
-            st.session_state.history.append(("bot", f"Failed to reach API: {e}", "<span class='badge' style='background:#f59e0b'>ERROR</span>"))
-
-# Render chat
-for item in st.session_state.history:
+def render(item):
     role = item[0]
     if role == "user":
         with st.chat_message("user"):
@@ -305,3 +361,62 @@ for item in st.session_state.history:
             st.markdown(f"<div class='msg bot'>{item[1]}</div>", unsafe_allow_html=True)
             if len(item) > 2 and item[2]:
                 st.markdown(f"<div class='meta'>{item[2]}</div>", unsafe_allow_html=True)
+
+ERROR_BADGE = "<span class='badge' style='background:#f59e0b'>ERROR</span>"
+
+# Render chat
+for item in st.session_state.history:
+    render(item)
+
+# Chat input
+user_input = st.chat_input("Type your question…")
+if user_input:
+    st.session_state.history.append(("user", user_input))
+    render(st.session_state.history[-1])
+    reply, source = None, None
+    with st.chat_message("assistant"):
+        # Updated in place as /ask/stream events arrive
+        live = st.empty()
+        live.markdown("<div class='msg bot'>Thinking…</div>", unsafe_allow_html=True)
+        try:
+            for event, res in api_stream("/ask/stream", {"question": user_input}):
+                if event == "candidates":
+                    bullets = "".join(f"<li>{c['question']} <span class='small'>({c['score']:.3f})</span></li>" for c in res)
+                    live.markdown(f"<div class='msg bot'>Trying AI on the closest FAQs…<ul>{bullets}</ul></div>",
+                                  unsafe_allow_html=True)
+                elif event == "error":
+                    reply = ("bot", f"API error: {res.get('detail')}", ERROR_BADGE)
+                elif event in ("faq", "final"):
+                    source = res.get("source")
+                    score = res.get("score")
+                    ticket_id = res.get("ticket_id")
+                    ans = res.get("answer") or ""
+
+                    # Build meta line with badge and numbers
+                    meta_bits = [source_badge(source)]
+                    if score is not None:
+                        meta_bits.append(f"<span class='small'>score: {score:.3f}</span>")
+                    if ticket_id:
+                        meta_bits.append(f"<span class='small'>ticket: #{ticket_id}</span>")
+                    if res.get("degraded"):
+                        meta_bits.append("<span class='small'>AI busy, best FAQ match</span>" if source == "faq"
+                                         else "<span class='small'>AI busy</span>")
+                    reply = ("bot", ans, " ".join(meta_bits))
+        except Exception as e:
+            reply = ("bot", f"Failed to reach API: {e}", ERROR_BADGE)
+        if reply is None:
+            reply = ("bot", "API error: stream ended without an answer", ERROR_BADGE)
+        live.markdown(f"<div class='msg bot'>{reply[1]}</div><div class='meta'>{reply[2]}</div>", unsafe_allow_html=True)
+
+    st.session_state.history.append(reply)
+    # If a ticket was created, re-run so the sidebar refreshes
+    if source == "ticket":
+        ticket_feed().invalidate(get_base_url())
+        st.rerun()
+
+# The sidebar ticket refresh ran alongside everything above; show its result now
+if tickets_refresh is not None:
+    try:
+        render_tickets(tickets_refresh.result(timeout=30))
+    except Exception:
+        render_tickets(None)